@@ -1 +1,25 @@
-from .service_azion import AzionAPI
+# Submodules are loaded on first access, so `import azion` stays cheap.
+import importlib
+
+_exports = {
+    'AzionAPI': 'service_azion',
+    'APIService': 'service_api',
+    'ServiceException': 'service_api',
+    'ServiceInvalidArgument': 'service_api',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
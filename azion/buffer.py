@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingWrite(object):
+    """ Writes waiting to be sent to a single path. """
+
+    def __init__(self, method, payload, timeout=None):
+        self.method = method
+        self.payload = dict(payload or {})
+        self.timeout = timeout
+        self.futures = []
+        self.count = 0
+
+    def merge(self, method, payload, timeout=None):
+        """
+            Merge a new write into the pending one. A PUT replaces the
+            whole pending payload, a PATCH is merged field by field (last
+            writer wins) keeping the method of the pending write. The
+            timeout of the last write giving one is used.
+        """
+        if timeout is not None:
+            self.timeout = timeout
+        if method == 'PUT':
+            self.method = 'PUT'
+            self.payload = dict(payload or {})
+        else:
+            self.payload.update(payload or {})
+
+
+class WriteBuffer(object):
+    """
+        Write-behind buffer of update() and override() calls. Pending writes
+        are merged per path and sent once, when max_delay seconds have
+        passed since the first pending write, when max_size paths are
+        pending or when flush() is called.
+    """
+
+    def __init__(self, send, max_delay=2.0, max_size=50):
+        """
+            :param callable send: function(method, path, payload, timeout)
+                that sends the write and returns the server response.
+            :param float max_delay: Seconds to hold writes before flushing.
+            :param int max_size: Number of pending paths that forces a flush.
+        """
+        self.send = send
+        self.max_delay = max_delay
+        self.max_size = max_size
+
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, method, path, payload, timeout=None):
+        """
+            Queue a write to path. timeout is the request timeout of the
+            merged write, the client default when None.
+
+            :return: Future resolving to the server response of the merged
+                write of this path.
+            :rtype : concurrent.futures.Future
+        """
+        future = Future()
+        flush_now = False
+
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None:
+                pending = _PendingWrite(method, payload, timeout)
+                self._pending[path] = pending
+            else:
+                pending.merge(method, payload, timeout)
+
+            pending.futures.append(future)
+            pending.count += 1
+
+            if len(self._pending) >= self.max_size:
+                flush_now = True
+            elif self._timer is None and self.max_delay is not None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            self.flush()
+
+        return future
+
+    def flush(self):
+        """
+            Send all pending writes, one request per path.
+
+            :return: Number of requests sent.
+            :rtype : Integer
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = OrderedDict()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        for path, write in pending.items():
+            logger.debug("Flushing %d write(s) to %s as one %s" % (
+                write.count, path, write.method))
+            try:
+                response = self.send(write.method, path, write.payload,
+                                     write.timeout)
+            except Exception as e:
+                for f in write.futures:
+                    f.set_exception(e)
+                continue
+
+            for f in write.futures:
+                f.set_result(response)
+
+        return len(pending)
+
+    def close(self):
+        """ Flush pending writes and stop the timer. """
+        return self.flush()
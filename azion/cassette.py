@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Cassette file: gzip compressed JSON lines, one request/response pair per
+# line with the keys m(ethod), u(rl), p(arams), b(ody), s(tatus),
+# h(eaders), t(ext) and e(lapsed seconds).
+
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from .transport import Transport, MemoryResponse
+
+
+class CassetteMiss(Exception):
+    """ Request not found in the replayed cassette. """
+    pass
+
+
+def _body(data, data_json):
+    if data_json is not None:
+        return data_json
+    if isinstance(data, bytes):
+        return data.decode('utf-8', 'replace')
+    return data
+
+
+def _key(method, url, params, body):
+    return (method.upper(), url, json.dumps(params, sort_keys=True),
+            json.dumps(body, sort_keys=True))
+
+
+def _dumps(entry):
+    return json.dumps(entry, separators=(',', ':'))
+
+
+class RecordingTransport(Transport):
+    """ Send requests through an inner transport and record them to path. """
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._file = gzip.open(path, 'wt')
+        self._lock = threading.Lock()
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        start = time.time()
+        response = self.inner.request(method, url, headers=headers,
+                                      params=params, data=data, json=json,
+                                      timeout=timeout, **kwargs)
+        elapsed = time.time() - start
+
+        content_type = response.headers.get('Content-Type')
+        entry = {'m': method.upper(), 'u': url, 'p': params,
+                 'b': _body(data, json), 's': response.status_code,
+                 'h': {'Content-Type': content_type} if content_type else {},
+                 't': response.text, 'e': round(elapsed, 6)}
+        line = _dumps(entry)
+        with self._lock:
+            self._file.write(line + '\n')
+
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(Transport):
+    """
+        Serve the responses recorded in a cassette. Identical requests are
+        answered in recording order. With realtime, each answer waits the
+        recorded latency, otherwise it is returned as fast as possible.
+    """
+
+    def __init__(self, path, realtime=False, inner=None):
+        self.path = path
+        self.realtime = realtime
+        self.inner = inner
+        self._entries = defaultdict(deque)
+        self._lock = threading.Lock()
+
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                e = json.loads(line)
+                self._entries[_key(e['m'], e['u'], e['p'], e['b'])].append(e)
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        # transport options (verify, ...) do not change the recorded answer
+        key = _key(method, url, params, _body(data, json))
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss('{} {} not recorded in {}'.format(
+                    method, url, self.path))
+            # keep the last answer to serve repeated requests
+            e = entries.popleft() if len(entries) > 1 else entries[0]
+
+        if self.realtime:
+            time.sleep(e['e'])
+
+        response = MemoryResponse(e['s'], e['t'], headers=e['h'],
+                                  elapsed=e['e'])
+        return response
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Command line interface of AzionAPI:
+#
+#   azion export --concurrency 3 | jq .name
+#   azion export --fields cname,origins.addresses
+#   azion get --name test-api --option rules
+#   azion apply --name test-api --file payload.json
+#   azion delete --id 14934121312
+
+import argparse
+import json
+import sys
+
+from .service_azion import AzionAPI
+
+
+def _dump(obj, out, indent=None):
+    out.write(json.dumps(obj, indent=indent, default=str))
+    out.write('\n')
+    out.flush()
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    return '{:.3f}s'.format(value)
+
+
+def print_stats(api, out):
+    """ Print request counts, wait time and latency percentiles. """
+    stats = api.stats.summary()
+    out.write('requests: {:d} (hedges: {:d}, errors: {:d})\n'.format(
+        stats['requests'], stats['hedges'], stats['errors']))
+    out.write('rate limit wait: {:.3f}s\n'.format(stats['wait']))
+    out.write('latency p50: {} p95: {} p99: {}\n'.format(
+        _fmt(stats['latency_p50']), _fmt(stats['latency_p95']),
+        _fmt(stats['latency_p99'])))
+
+
+def cmd_export(api, args, out):
+    if args.fields:
+        configs = api.fetch(args.fields.split(','),
+                            concurrency=args.concurrency)
+    else:
+        configs = api.iter_cdn_config(concurrency=args.concurrency)
+
+    for cfg in configs:
+        _dump(cfg, out)
+    return api.status['ok']
+
+
+def cmd_get(api, args, out):
+    cfg, status = api.get_cdn_config(option=args.option, cdn_id=args.id,
+                                     cdn_name=args.name)
+    _dump(cfg, out, indent=4)
+    return status
+
+
+def cmd_apply(api, args, out):
+    payload = None
+    if args.file == '-':
+        payload = json.load(sys.stdin)
+    elif args.file:
+        with open(args.file) as f:
+            payload = json.load(f)
+
+    if args.dry_run:
+        plan, status = api.create_cdn(args.name, payload, dry_run=True)
+        for c in plan:
+            _dump(c.to_dict(), out)
+        args.err.write('calls: {:d}, estimated time: {:.1f}s\n'.format(
+            len(plan), plan.estimate(concurrency=args.concurrency)))
+        return status
+
+    cfg, status = api.create_cdn(args.name, payload,
+                                 concurrency=args.concurrency)
+    _dump(cfg, out, indent=4)
+    return status
+
+
+def cmd_delete(api, args, out):
+    resp, status = api.delete_cdn(args.id)
+    _dump(resp, out)
+    return status
+
+
+def parser():
+    p = argparse.ArgumentParser(prog='azion',
+                                description='AZION API command line.')
+    p.add_argument('--url', default=None, help="URL of Azion's API.")
+    p.add_argument('--token', default=None,
+                   help='Session token, env AZION_TOKEN by default.')
+    p.add_argument('--rate-limit', type=int, default=None,
+                   help='Max requests per minute (default: 20).')
+    p.add_argument('--concurrency', type=int, default=1,
+                   help='Requests running at the same time.')
+    p.add_argument('--timeout', type=float, default=None,
+                   help='Timeout of each request, in seconds.')
+    p.add_argument('--stats', action='store_true',
+                   help='Print request statistics to stderr when done.')
+
+    sub = p.add_subparsers(dest='command')
+    sub.required = True
+
+    s = sub.add_parser('export', help='Stream all CDNs as NDJSON.')
+    s.add_argument('--fields', help='Comma separated fields to fetch, eg. '
+                   'cname,rules_engine.path,origins.addresses')
+    s.set_defaults(func=cmd_export)
+
+    s = sub.add_parser('get', help='Get a CDN config.')
+    g = s.add_mutually_exclusive_group(required=True)
+    g.add_argument('--id', type=int)
+    g.add_argument('--name')
+    s.add_argument('--option', default='all',
+                   choices=['all', 'origin', 'cache', 'rules'])
+    s.set_defaults(func=cmd_get)
+
+    for name in ('apply', 'create'):
+        s = sub.add_parser(name, help='Create a CDN.')
+        s.add_argument('--name', required=True)
+        s.add_argument('--file', help='JSON payload, - for stdin. The '
+                       'sample config is used when not set.')
+        s.add_argument('--dry-run', action='store_true',
+                       help='Print the planned calls instead.')
+        s.set_defaults(func=cmd_apply)
+
+    s = sub.add_parser('delete', help='Delete a CDN.')
+    s.add_argument('--id', type=int, required=True)
+    s.set_defaults(func=cmd_delete)
+
+    return p
+
+
+def main(argv=None, api=None, out=None, err=None):
+    """
+        Run the command line. api, out and err replace the client built
+        from the options, stdout and stderr; an api given is used as is.
+    """
+    args = parser().parse_args(argv)
+    out = out or sys.stdout
+    args.err = err or sys.stderr
+
+    if api is None:
+        kwargs = {}
+        if args.rate_limit:
+            kwargs['rate_limit'] = args.rate_limit
+        api = AzionAPI(url_api=args.url, token=args.token,
+                       timeout=args.timeout, **kwargs)
+
+    try:
+        status = args.func(api, args, out)
+    finally:
+        if args.stats:
+            print_stats(api, args.err)
+
+    return 0 if status == api.status['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
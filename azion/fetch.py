@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .inventory import origin_id
+from .sync import SUB_RESOURCES
+
+# Rules Engine fields computed from other sub-resources:
+# field -> (sub-resource needed, its fields used)
+DERIVED_FIELDS = {
+    'rules_engine': {
+        'path_origin_name': ('origins', ('origin_id', 'id', 'name')),
+        'cache_settings_name': ('cache_settings', ('id', 'name')),
+    }
+}
+
+# Base fields kept by any spec
+BASE_FIELDS = ('id', 'name')
+
+# get_cdn_config() options
+OPTIONS = {
+    'all': ['*', 'origins', 'cache_settings', 'rules_engine'],
+    'origin': ['*', 'origins'],
+    'cache': ['*', 'cache_settings'],
+    'rules': ['*', 'rules_engine'],
+}
+
+
+class FetchSpec(object):
+    """
+        Declare the CDN fields to fetch. Fields are names of the CDN base
+        record (eg. cname), sub-resources (origins, cache_settings,
+        rules_engine) or fields of a sub-resource (eg. rules_engine.path,
+        origins.addresses). '*' keeps every base field, a sub-resource name
+        alone keeps all its fields.
+
+        rules_engine.path_origin_name and rules_engine.cache_settings_name
+        are filled from the origins and cache settings, which are then
+        fetched too.
+    """
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.base = set(BASE_FIELDS)
+        self.sub = {}
+
+        for f in self.fields:
+            if f == '*':
+                self.base = None
+            elif f in SUB_RESOURCES:
+                self.sub[f] = None
+            elif '.' in f:
+                kind, field = f.split('.', 1)
+                if kind not in SUB_RESOURCES:
+                    raise ValueError('Unknown sub-resource: {}'.format(kind))
+                if field == '*':
+                    self.sub[kind] = None
+                elif self.sub.get(kind, ()) is not None:
+                    self.sub.setdefault(kind, set()).add(field)
+            elif self.base is not None:
+                self.base.add(f)
+
+    @classmethod
+    def from_option(cls, option):
+        """ Return the spec of a get_cdn_config() option, or None. """
+        if option not in OPTIONS:
+            return None
+        return cls(OPTIONS[option])
+
+    def derived(self, kind):
+        """ Return the derived fields requested from kind. """
+        fields = self.sub.get(kind)
+        derived = DERIVED_FIELDS.get(kind, {})
+        if fields is None:
+            return []
+        return [f for f in fields if f in derived]
+
+    def endpoints(self):
+        """
+            Return the sub-resources to fetch, in dependency order, ie. a
+            sub-resource is listed after the ones it is derived from.
+        """
+        needed = set(self.sub)
+        for kind in list(self.sub):
+            for f in self.derived(kind):
+                needed.add(DERIVED_FIELDS[kind][f][0])
+        return [kind for kind in SUB_RESOURCES if kind in needed]
+
+    def _derive(self, cdn_config, kind, items):
+        for f in self.derived(kind):
+            source = cdn_config.get(DERIVED_FIELDS[kind][f][0])
+            if not isinstance(source, list):
+                continue
+            if f == 'path_origin_name':
+                names = dict((origin_id(o), o.get('name')) for o in source)
+                for i in items:
+                    i[f] = names.get(i.get('path_origin_id'))
+            elif f == 'cache_settings_name':
+                names = dict((c.get('id'), c.get('name')) for c in source)
+                for i in items:
+                    i[f] = names.get(i.get('cache_settings_id'))
+
+    def select(self, cdn_config):
+        """
+            Fill the derived fields and keep only the fields of the spec.
+
+            :param dict cdn_config: CDN config with the endpoints fetched.
+            :return: New dict with the selected fields.
+            :rtype : Dict
+        """
+        for kind in self.sub:
+            items = cdn_config.get(kind)
+            if isinstance(items, list):
+                self._derive(cdn_config, kind, items)
+
+        if self.base is None:
+            cfg = dict((k, v) for k, v in cdn_config.items()
+                       if k not in SUB_RESOURCES)
+        else:
+            cfg = dict((k, cdn_config[k]) for k in self.base
+                       if k in cdn_config)
+
+        for kind, fields in self.sub.items():
+            items = cdn_config.get(kind)
+            if fields is None or not isinstance(items, list):
+                cfg[kind] = items
+            else:
+                cfg[kind] = [dict((k, i[k]) for k in fields if k in i)
+                             for i in items]
+        return cfg
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+
+def _items(cdn_config, key):
+    """ Return the list of sub-resources key, ignoring API errors. """
+    items = cdn_config.get(key)
+    return items if isinstance(items, list) else []
+
+
+def origin_id(origin):
+    """ Return the ID of an origin, API returns it as origin_id. """
+    return origin.get('origin_id', origin.get('id'))
+
+
+class Inventory(object):
+    """
+        In-memory index of expanded CDN configurations, as returned by
+        get_cdn_config(). Lookups by cname, origin address, host header,
+        cache setting and rule path are dict accesses. Adding a CDN
+        already indexed replaces it.
+    """
+
+    INDEXES = ('name', 'cname', 'origin_address', 'host_header',
+               'cache_setting_name', 'rule_cache_setting', 'rule_path')
+
+    def __init__(self, cdn_configs=None):
+        self.cdns = {}
+        self._indexes = dict((i, {}) for i in self.INDEXES)
+        self._keys = {}
+        self._lock = threading.RLock()
+
+        for c in cdn_configs or []:
+            self.add(c)
+
+    def __len__(self):
+        return len(self.cdns)
+
+    def __contains__(self, cdn_id):
+        return cdn_id in self.cdns
+
+    def __iter__(self):
+        return iter(list(self.cdns.values()))
+
+    def _index(self, cdn_id, index, key, item):
+        if key is None:
+            return
+        self._indexes[index].setdefault(key, {}).setdefault(
+            cdn_id, []).append(item)
+        self._keys[cdn_id].add((index, key))
+
+    def add(self, cdn_config):
+        """ Index an expanded CDN config, replacing a previous version. """
+        if not isinstance(cdn_config, dict) or 'id' not in cdn_config:
+            return
+
+        cdn_id = cdn_config['id']
+        with self._lock:
+            self.remove(cdn_id)
+            self.cdns[cdn_id] = cdn_config
+            self._keys[cdn_id] = set()
+
+            self._index(cdn_id, 'name', cdn_config.get('name'), cdn_config)
+            for cname in cdn_config.get('cname') or []:
+                self._index(cdn_id, 'cname', cname.lower(), cdn_config)
+
+            for o in _items(cdn_config, 'origins'):
+                self._index(cdn_id, 'host_header', o.get('host_header'), o)
+                for a in o.get('addresses') or []:
+                    self._index(cdn_id, 'origin_address', a.get('address'), o)
+
+            for cs in _items(cdn_config, 'cache_settings'):
+                self._index(cdn_id, 'cache_setting_name', cs.get('name'), cs)
+
+            for r in _items(cdn_config, 'rules_engine'):
+                self._index(cdn_id, 'rule_path', r.get('path'), r)
+                if r.get('cache_settings_id') is not None:
+                    self._index(cdn_id, 'rule_cache_setting',
+                                (cdn_id, r['cache_settings_id']), r)
+
+    def remove(self, cdn_id):
+        """ Remove a CDN and its sub-resources from the indexes. """
+        with self._lock:
+            for index, key in self._keys.pop(cdn_id, ()):
+                entries = self._indexes[index][key]
+                entries.pop(cdn_id, None)
+                if not entries:
+                    del self._indexes[index][key]
+            return self.cdns.pop(cdn_id, None)
+
+    def _lookup(self, index, key):
+        """ Return [(cdn_config, item)] indexed by key. """
+        with self._lock:
+            entries = self._indexes[index].get(key, {})
+            return [(self.cdns[cdn_id], item)
+                    for cdn_id, items in entries.items() for item in items]
+
+    # Queries
+    def get(self, cdn_id):
+        return self.cdns.get(cdn_id)
+
+    def by_name(self, name):
+        """ Return the CDN config named name, or None. """
+        found = self._lookup('name', name)
+        return found[0][0] if found else None
+
+    def by_cname(self, cname):
+        """ Return the CDNs serving cname. """
+        return [c for c, _ in self._lookup('cname', cname.lower())]
+
+    def by_origin_address(self, address):
+        """ Return [(cdn_config, origin)] using the origin address. """
+        return self._lookup('origin_address', address)
+
+    def by_host_header(self, host_header):
+        """ Return [(cdn_config, origin)] using the host header. """
+        return self._lookup('host_header', host_header)
+
+    def by_cache_setting(self, name):
+        """ Return [(cdn_config, cache_setting)] named name. """
+        return self._lookup('cache_setting_name', name)
+
+    def by_rule_path(self, path):
+        """ Return [(cdn_config, rule)] matching path. """
+        return self._lookup('rule_path', path)
+
+    def rules_by_cache_setting(self, name):
+        """ Return [(cdn_config, rule)] pointing to the cache setting name. """
+        found = []
+        for cdn, cs in self.by_cache_setting(name):
+            found.extend(self._lookup('rule_cache_setting',
+                                      (cdn['id'], cs.get('id'))))
+        return found
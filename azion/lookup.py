@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+class LookupTable(object):
+    """
+        TTL cached name to ID table of a resource list. The whole list is
+        fetched at once: when the table expired, or when a name is missing.
+        Fetches, failed or not, are at least min_refresh seconds apart; a
+        failed fetch keeps the previous table.
+    """
+
+    def __init__(self, fetch=None, ttl=300.0, min_refresh=5.0):
+        """
+            :param callable fetch: Return the list of dicts with name and id,
+                used when resolve() is not given one.
+            :param float ttl: Seconds before the table is fetched again.
+            :param float min_refresh: Min seconds between two fetches.
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.refreshes = 0
+        self._ids = {}
+        self._fetched_at = None
+        self._attempted_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _refresh(self, fetch):
+        self._attempted_at = time.time()
+        self.refreshes += 1
+        items = fetch()
+        if isinstance(items, dict):
+            items = items.get('results')
+        if not isinstance(items, list):
+            return
+        self._ids = dict((i.get('name'), i.get('id')) for i in items
+                         if isinstance(i, dict))
+        self._fetched_at = self._attempted_at
+
+    def refresh(self, fetch=None):
+        with self._lock:
+            self._refresh(fetch or self.fetch)
+
+    def resolve(self, name, fetch=None):
+        """
+            Return the ID of name, or None when it does not exist.
+
+            :param str name: Name to resolve.
+            :param callable fetch: Fetch of the caller, eg. bound to its
+                client, the table fetch by default.
+        """
+        with self._lock:
+            now = time.time()
+            expired = (self._fetched_at is None or
+                       now - self._fetched_at > self.ttl)
+            if (expired or name not in self._ids) and (
+                    self._attempted_at is None or
+                    now - self._attempted_at > self.min_refresh):
+                self._refresh(fetch or self.fetch)
+            return self._ids.get(name)
+
+
+def shared_table(key, ttl=300.0):
+    """
+        Return the LookupTable of key, shared by every client of the
+        process. The table has no fetch, clients pass theirs to resolve().
+    """
+    with _shared_lock:
+        table = _shared.get(key)
+        if table is None:
+            table = _shared[key] = LookupTable(ttl=ttl)
+        return table
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+
+
+class PlannedCall(object):
+    """ A HTTP call of a Plan. """
+    __slots__ = ('index', 'method', 'path', 'depends_on', 'description')
+
+    def __init__(self, index, method, path, depends_on=None, description=None):
+        self.index = index
+        self.method = method
+        self.path = path
+        self.depends_on = list(depends_on or [])
+        self.description = description
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'method': self.method,
+            'path': self.path,
+            'depends_on': self.depends_on,
+            'description': self.description
+        }
+
+    def __repr__(self):
+        return '<PlannedCall {:d} {:s} {:s}>'.format(self.index, self.method,
+                                                     self.path)
+
+
+class Plan(object):
+    """
+        The HTTP calls an operation would make, in dependency order: a call
+        only depends on calls listed before it. Server assigned IDs unknown
+        at plan time are shown as {id} in the path.
+    """
+
+    def __init__(self, rate_limit=20, period=60.0, latency=0.3):
+        """
+            :param int rate_limit: Requests allowed per period, None for no
+                limit.
+            :param float period: Rate limit window in seconds.
+            :param float latency: Expected seconds of each call.
+        """
+        self.rate_limit = rate_limit
+        self.period = period
+        self.latency = latency
+        self.calls = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def __iter__(self):
+        return iter(self.calls)
+
+    def add(self, method, path, depends_on=None, description=None):
+        """ Append a call and return its index. """
+        call = PlannedCall(len(self.calls), method, path, depends_on,
+                           description)
+        self.calls.append(call)
+        return call.index
+
+    def count(self, method=None):
+        """ Return the number of calls, optionally of a single method. """
+        if method is None:
+            return len(self.calls)
+        return len([c for c in self.calls if c.method == method])
+
+    def estimate(self, concurrency=1, rate_limit=None, period=None,
+                 latency=None):
+        """
+            Estimate the wall time in seconds to run the plan. Calls start in
+            plan order, on at most `concurrency` workers, after their
+            dependencies finished and without exceeding the rate limit.
+
+            :return: Estimated seconds.
+            :rtype : Float
+        """
+        rate_limit = rate_limit or self.rate_limit
+        period = self.period if period is None else period
+        latency = self.latency if latency is None else latency
+
+        workers = [0.0] * max(int(concurrency), 1)
+        starts = []
+        finish = {}
+        last_start = 0.0
+
+        for c in self.calls:
+            t = max([last_start, workers[0]] +
+                    [finish[d] for d in c.depends_on])
+            if rate_limit and len(starts) >= rate_limit:
+                t = max(t, starts[-rate_limit] + period)
+
+            heapq.heapreplace(workers, t + latency)
+            starts.append(t)
+            finish[c.index] = t + latency
+            last_start = t
+
+        return max(finish.values()) if finish else 0.0
+
+    def to_list(self):
+        return [c.to_dict() for c in self.calls]
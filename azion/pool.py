@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor,
+                                as_completed)
+
+from .service_azion import AzionAPI
+
+logger = logging.getLogger(__name__)
+
+
+def _run_account(account, url_api, token, client_kwargs, operation, args,
+                 kwargs):
+    """ Run an AzionAPI operation in a worker process. """
+    api = AzionAPI(url_api=url_api, token=token, **client_kwargs)
+    return account, getattr(api, operation)(*args, **kwargs)
+
+
+class AccountPool(object):
+    """
+        Pool of AzionAPI clients, one per account. Each client has its own
+        connection pool and rate budget, so operations run concurrently
+        across accounts.
+    """
+
+    def __init__(self, accounts=None, url_api=None, executor='thread',
+                 max_workers=None):
+        """
+            :param dict accounts: Map of account name to session token.
+            :param str url_api: URL of Azion's API.
+            :param str executor: Run accounts on 'thread' or 'process' workers.
+            :param int max_workers: Max accounts running at the same time,
+                all of them by default.
+        """
+        if executor not in ('thread', 'process'):
+            raise ValueError('executor must be thread or process')
+
+        self.url_api = url_api
+        self.executor = executor
+        self.max_workers = max_workers
+        self.clients = {}
+        self.tokens = {}
+        self.client_kwargs = {}
+
+        for account, token in (accounts or {}).items():
+            self.add(account, token)
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __getitem__(self, account):
+        return self.clients[account]
+
+    def add(self, account, token, **kwargs):
+        """
+            Add an account client. kwargs are passed to AzionAPI, and to the
+            clients built by the process workers, where they must be
+            picklable.
+        """
+        self.tokens[account] = token
+        self.client_kwargs[account] = kwargs
+        self.clients[account] = AzionAPI(url_api=self.url_api, token=token,
+                                         **kwargs)
+        return self.clients[account]
+
+    def remove(self, account):
+        self.tokens.pop(account, None)
+        self.client_kwargs.pop(account, None)
+        return self.clients.pop(account, None)
+
+    def imap(self, operation, *args, **kwargs):
+        """
+            Run operation on every account concurrently and yield
+            (account, result) as each account finishes. operation is the
+            name of an AzionAPI method, or with the thread executor a
+            callable(api).
+
+            :return: Generator of (account, result) tuples.
+        """
+        if not self.clients:
+            return
+
+        workers = self.max_workers or len(self.clients)
+
+        if self.executor == 'process':
+            if callable(operation):
+                raise ValueError('process executor needs an operation name')
+            pool = ProcessPoolExecutor(max_workers=workers)
+            futures = dict((pool.submit(_run_account, account,
+                                        self.url_api, self.tokens[account],
+                                        self.client_kwargs[account],
+                                        operation, args, kwargs), account)
+                           for account in self.clients)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            futures = {}
+            for account, api in self.clients.items():
+                if callable(operation):
+                    f = pool.submit(operation, api, *args, **kwargs)
+                else:
+                    f = pool.submit(getattr(api, operation), *args, **kwargs)
+                futures[f] = account
+
+        try:
+            for f in as_completed(futures):
+                account = futures[f]
+                try:
+                    result = f.result()
+                except Exception as e:
+                    logger.error("ERROR account(%s) operation(%s): %s" % (
+                        account, operation, e))
+                    result = {'error': '{}'.format(e)}
+                else:
+                    if self.executor == 'process':
+                        result = result[1]
+                yield account, result
+        finally:
+            # stop the accounts not started yet when the caller stops early
+            for f in futures:
+                f.cancel()
+            pool.shutdown(wait=False)
+
+    def map(self, operation, *args, **kwargs):
+        """ Run operation on every account, return {account: result}. """
+        return dict(self.imap(operation, *args, **kwargs))
+
+    def get_cdn_config(self, **kwargs):
+        """ Stream (account, get_cdn_config() result) of every account. """
+        return self.imap('get_cdn_config', **kwargs)
+
+    def create_cdn(self, cdn_name, cdn_payload=None):
+        """ Stream (account, create_cdn() result) of every account. """
+        return self.imap('create_cdn', cdn_name, cdn_payload)
+
+    def iter_cdn_config(self, **kwargs):
+        """
+            Stream every CDN of every account as (account, cdn_config), in
+            the order they are expanded across accounts. An account that
+            failed is yielded as (account, {'error': ...}). kwargs are
+            passed to AzionAPI.iter_cdn_config(), eg. concurrency.
+
+            With the process executor, the CDNs of an account are yielded
+            once the whole account was fetched.
+        """
+        if self.executor == 'process':
+            return self._iter_cdn_config_accounts(**kwargs)
+        return self._iter_cdn_config_merged(**kwargs)
+
+    def _iter_cdn_config_accounts(self, **kwargs):
+        for account, result in self.get_cdn_config(**kwargs):
+            if not isinstance(result, tuple):
+                yield account, result
+                continue
+            cfg, status = result
+            if isinstance(cfg, list):
+                for c in cfg:
+                    yield account, c
+            elif isinstance(cfg, dict) and cfg:
+                yield account, cfg
+
+    def _iter_cdn_config_merged(self, **kwargs):
+        """ Merge the iter_cdn_config() of every account through a queue. """
+        if not self.clients:
+            return
+
+        from queue import Queue
+
+        results = Queue()
+        stop = threading.Event()
+        done = object()
+
+        def stream(account, api):
+            configs = api.iter_cdn_config(**kwargs)
+            try:
+                for cfg in configs:
+                    if stop.is_set():
+                        break
+                    results.put((account, cfg))
+            except Exception as e:
+                logger.error("ERROR account(%s) iter_cdn_config: %s" % (
+                    account, e))
+                results.put((account, {'error': '{}'.format(e)}))
+            finally:
+                configs.close()
+                results.put((account, done))
+
+        pool = ThreadPoolExecutor(
+            max_workers=self.max_workers or len(self.clients))
+        futures = [pool.submit(stream, account, api)
+                   for account, api in self.clients.items()]
+        running = len(futures)
+        try:
+            while running:
+                account, cfg = results.get()
+                if cfg is done:
+                    running -= 1
+                else:
+                    yield account, cfg
+        finally:
+            stop.set()
+            for f in futures:
+                f.cancel()
+            pool.shutdown(wait=False)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Local read-through caching proxy of Azion API. Every consumer of the host
+# shares the connections, the rate limiter and the cached GET responses:
+#
+#   python -m azion.proxy --port 8080
+#   AzionAPI(url_api='http://127.0.0.1:8080')
+#
+# Replies carry the PROXY_HEADER header, a client built with its default
+# rate limiter drops it on the first reply, as the proxy throttles for all.
+
+import argparse
+import logging
+import threading
+import time
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from .service_api import APIService, PROXY_HEADER
+from .throttle import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+FORWARD_HEADERS = ('Authorization', 'Accept', 'Content-Type')
+
+
+class ResponseCache(object):
+    """ TTL cache of GET responses, invalidated by writes to related paths. """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+
+    @staticmethod
+    def _segments(path):
+        return [s for s in path.split('?', 1)[0].split('/') if s]
+
+    def invalidate(self, path):
+        """
+            Drop the entries of path, of its sub-resources and of its parent
+            collections, eg. a POST to /a/1/origins drops /a/1/origins/2,
+            /a/1 and /a, but not /a/12.
+        """
+        path = self._segments(path)
+        with self._lock:
+            for key in list(self._entries):
+                cached = self._segments(key[0])
+                n = min(len(cached), len(path))
+                if cached[:n] == path[:n]:
+                    del self._entries[key]
+
+
+class ProxyServer(ThreadingMixIn, HTTPServer):
+    """ HTTP server forwarding to Azion API through a shared APIService. """
+    daemon_threads = True
+
+    def __init__(self, address, upstream='https://api.azion.net', ttl=60.0,
+                 rate_limit=20, service=None):
+        HTTPServer.__init__(self, address, ProxyHandler)
+        self.service = service or APIService(
+            upstream, rate_limiter=RateLimiter(rate_limit, 60))
+        self.cache = ResponseCache(ttl)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+
+    def _forward(self, method):
+        server = self.server
+        headers = dict((h, self.headers.get(h)) for h in FORWARD_HEADERS
+                       if self.headers.get(h) is not None)
+        key = (self.path, headers.get('Authorization'), headers.get('Accept'))
+
+        cached = server.cache.get(key) if method == 'GET' else None
+        if cached is not None:
+            return self._reply(cached, 'HIT')
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+
+        try:
+            response = server.service.request(method, self.path,
+                                              headers=headers, data=body,
+                                              accept_json=False)
+        except Exception as e:
+            return self._reply((502, 'text/plain', '{}'.format(e)), 'MISS')
+
+        content = (response.status_code,
+                   response.headers.get('Content-Type', 'application/json'),
+                   response.text)
+
+        if method == 'GET':
+            if 200 <= response.status_code < 300:
+                server.cache.set(key, content)
+        else:
+            server.cache.invalidate(self.path)
+
+        self._reply(content, 'MISS')
+
+    def _reply(self, content, cache_status):
+        status_code, content_type, text = content
+        body = text.encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Cache', cache_status)
+        self.send_header(PROXY_HEADER, '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._forward('GET')
+
+    def do_POST(self):
+        self._forward('POST')
+
+    def do_PUT(self):
+        self._forward('PUT')
+
+    def do_PATCH(self):
+        self._forward('PATCH')
+
+    def do_DELETE(self):
+        self._forward('DELETE')
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def serve(host='127.0.0.1', port=8080, upstream='https://api.azion.net',
+          ttl=60.0, rate_limit=20):
+    """ Run the proxy until interrupted. """
+    server = ProxyServer((host, port), upstream=upstream, ttl=ttl,
+                         rate_limit=rate_limit)
+    logger.info("Proxying %s on http://%s:%d" % (upstream, host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Local caching proxy of Azion API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--upstream', default='https://api.azion.net')
+    parser.add_argument('--ttl', type=float, default=60.0,
+                        help='Seconds to cache GET responses.')
+    parser.add_argument('--rate-limit', type=int, default=20,
+                        help='Max requests per minute to the upstream.')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.upstream, args.ttl, args.rate_limit)
+
+
+if __name__ == '__main__':
+    main()
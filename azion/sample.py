@@ -1,182 +1,226 @@
+# Sample CDN config. The payloads are compiled once as PayloadTemplate and
+# rendered for each CDN name; parameters without value use the defaults.
+from .templates import PayloadTemplate, Param
+
+AZION_CDN = {
+    "name": "{cdn_name}",
+    "origin_address": "{origin_address}",
+    "cname_access_only": True,
+    "cname": ["{cname}"],
+    "delivery_protocol": "http",
+    "cdn_cache_settings": "override",
+    "cdn_cache_settings_minimum_ttl": Param("minimum_ttl", int),
+    "origin_protocol_policy": "preserve"
+}
+
+AZION_CDN_DEFAULTS = {
+    "origin_address": "domain.{cdn_name}",
+    "cname": "www1.{cdn_name}",
+    "minimum_ttl": 2592000,
+}
+
+AZION_CDN_ORIGIN = [
+        {
+            "name": "origin-default",
+            "origin_type": "single_origin",
+            "host_header": "www.{cdn_name}",
+            "origin_protocol_policy": "https",
+            "addresses": [
+                {
+                 "address": "{origin_default}"
+                }
+            ],
+            "connection_timeout": 10,
+            "timeout_between_bytes": 30
+        },
+        {
+            "name": "origin-balanced",
+            "origin_type": "load_balancer",
+            "method": "ip_hash",
+            "host_header": "www-lb.{cdn_name}",
+            "origin_protocol_policy": "preserve",
+            "addresses": [
+                {
+                 "address": "{origin_balanced_primary}",
+                 "weight": 10,
+                 "server_role": "primary",
+                 "is_active": True
+                },
+                {
+                 "address": "{origin_balanced_backup}",
+                 "weight": 1,
+                 "server_role": "backup",
+                 "is_active": True
+                }
+            ],
+            "connection_timeout": 10,
+            "timeout_between_bytes": 30
+        },
+        {
+            "name": "origin-static",
+            "origin_type": "single_origin",
+            "host_header": "static.{cdn_name}",
+            "origin_protocol_policy": "http",
+            "addresses": [
+                {
+                 "address": "{origin_static}"
+                }
+            ],
+            "connection_timeout": 10,
+            "timeout_between_bytes": 20
+        },
+        {
+            "name": "origin-proxy",
+            "origin_type": "single_origin",
+            "host_header": "proxy.{cdn_name}",
+            "origin_protocol_policy": "preserve",
+            "addresses": [
+                {
+                 "address": "{origin_proxy}"
+                }
+            ],
+            "connection_timeout": 10,
+            "timeout_between_bytes": 20
+        }
+    ]
+
+AZION_CDN_ORIGIN_DEFAULTS = {
+    "origin_default": "origin-www.{cdn_name}",
+    "origin_balanced_primary": "www-lb1.{cdn_name}",
+    "origin_balanced_backup": "origin-lb2.{cdn_name}",
+    "origin_static": "origin-static.{cdn_name}",
+    "origin_proxy": "origin-proxy.{cdn_name}",
+}
+
+AZION_CDN_CACHE = [
+  {
+    "name": "cache-1-hour-ignore-qs-cookies",
+    "browser_cache_settings": False,
+    "cdn_cache_settings": "override",
+    "cdn_cache_settings_maximum_ttl": Param("cache_long_ttl", int),
+    "cache_by_query_string": "ignore",
+    "enable_query_string_sort": False,
+    "cache_by_cookies": "ignore",
+  },
+  {
+    "name": "cache-5-minutes-ignore-qs-cookies",
+    "browser_cache_settings": False,
+    "cdn_cache_settings": "override",
+    "cdn_cache_settings_maximum_ttl": Param("cache_short_ttl", int),
+    "cache_by_query_string": "ignore",
+    "enable_query_string_sort": False,
+    "cache_by_cookies": "ignore",
+  },
+  {
+    "name": "cache-bypass",
+    "browser_cache_settings": False,
+    "cdn_cache_settings": "bypass",
+    "cache_by_query_string": "ignore",
+    "cache_by_cookies": "ignore",
+  }
+]
+
+AZION_CDN_CACHE_DEFAULTS = {
+    "cache_long_ttl": 3600,
+    "cache_short_ttl": 300,
+}
+
+AZION_CDN_RULES = [
+      {
+        "path": "/images/",
+        "regex": False,
+        "protocol_policy": "http,https",
+        "gzip": True,
+        "behavior": "delivery",
+        "path_origin_name": "origin-static",
+        "cache_settings_name": "cache-1-hour-ignore-qs-cookies"
+      },
+      {
+        "path": "/fonts/",
+        "regex": False,
+        "protocol_policy": "http,https",
+        "gzip": True,
+        "behavior": "delivery",
+        "path_origin_name": "origin-static",
+        "cache_settings_name": "cache-1-hour-ignore-qs-cookies"
+      },
+      {
+        "path": "/css/",
+        "regex": False,
+        "protocol_policy": "http,https",
+        "gzip": True,
+        "behavior": "delivery",
+        "path_origin_name": "origin-static",
+        "cache_settings_name": "cache-5-minutes-ignore-qs-cookies"
+      },
+      {
+        "path": "/js/",
+        "regex": False,
+        "protocol_policy": "http,https",
+        "gzip": True,
+        "behavior": "delivery",
+        "path_origin_name": "origin-static",
+        "cache_settings_name": "cache-5-minutes-ignore-qs-cookies"
+      },
+      {
+        "path": "/proxy",
+        "regex": False,
+        "protocol_policy": "http",
+        "gzip": True,
+        "behavior": "acceleration",
+        "path_origin_name": "origin-proxy",
+        "cache_settings_name": "cache-bypass",
+        "forward_cookies": "all"
+      },
+      {
+        "path": "/site",
+        "regex": False,
+        "protocol_policy": "http",
+        "gzip": True,
+        "behavior": "acceleration",
+        "path_origin_name": "origin-default",
+        "cache_settings_name": "cache-bypass",
+        "forward_cookies": "all"
+      }
+]
+
+CDN_TEMPLATE = PayloadTemplate(AZION_CDN, AZION_CDN_DEFAULTS)
+ORIGIN_TEMPLATE = PayloadTemplate(AZION_CDN_ORIGIN, AZION_CDN_ORIGIN_DEFAULTS)
+CACHE_TEMPLATE = PayloadTemplate(AZION_CDN_CACHE, AZION_CDN_CACHE_DEFAULTS)
+RULES_TEMPLATE = PayloadTemplate(AZION_CDN_RULES)
+
+# Full CDN payload, with origins, cache settings and rules
+AZION_CDN_PAYLOAD_DEFAULTS = dict(AZION_CDN_DEFAULTS,
+                                  **dict(AZION_CDN_ORIGIN_DEFAULTS,
+                                         **AZION_CDN_CACHE_DEFAULTS))
+CDN_PAYLOAD_TEMPLATE = PayloadTemplate(
+    dict(AZION_CDN, origins=AZION_CDN_ORIGIN, cache_settings=AZION_CDN_CACHE,
+         rules_engine=AZION_CDN_RULES),
+    AZION_CDN_PAYLOAD_DEFAULTS)
 
 
 def azion_cdn(cdn_name):
     """
         Create default CDN attributes.
     """
-    return {
-        "name": cdn_name,
-        "origin_address": "domain.{}".format(cdn_name),
-        "cname_access_only": True,
-        "cname": ["www1.{}".format(cdn_name)],
-        "delivery_protocol": "http",
-        "cdn_cache_settings": "override",
-        "cdn_cache_settings_minimum_ttl": 2592000,
-        "origin_protocol_policy": "preserve"
-    }
+    return CDN_TEMPLATE.render(share=False, cdn_name=cdn_name)
 
 def azion_cdn_origin(cdn_name):
     """
         Create default CDN Rules Engine config.
     """
-    return [
-            {
-                "name": "origin-default",
-                "origin_type": "single_origin",
-                "host_header": "www.{}".format(cdn_name),
-                "origin_protocol_policy": "https",
-                "addresses": [
-                    {
-                     "address": "origin-www.{}".format(cdn_name)
-                    }
-                ],
-                "connection_timeout": 10,
-                "timeout_between_bytes": 30
-            },
-            {
-                "name": "origin-balanced",
-                "origin_type": "load_balancer",
-                "method": "ip_hash",
-                "host_header": "www-lb.{}".format(cdn_name),
-                "origin_protocol_policy": "preserve",
-                "addresses": [
-                    {
-                     "address": "www-lb1.{}".format(cdn_name),
-                     "weight": 10,
-                     "server_role": "primary",
-                     "is_active": True
-                    },
-                    {
-                     "address": "origin-lb2.{}".format(cdn_name),
-                     "weight": 1,
-                     "server_role": "backup",
-                     "is_active": True
-                    }
-                ],
-                "connection_timeout": 10,
-                "timeout_between_bytes": 30
-            },
-            {
-                "name": "origin-static",
-                "origin_type": "single_origin",
-                "host_header": "static.{}".format(cdn_name),
-                "origin_protocol_policy": "http",
-                "addresses": [
-                    {
-                     "address": "origin-static.{}".format(cdn_name)
-                    }
-                ],
-                "connection_timeout": 10,
-                "timeout_between_bytes": 20
-            },
-            {
-                "name": "origin-proxy",
-                "origin_type": "single_origin",
-                "host_header": "proxy.{}".format(cdn_name),
-                "origin_protocol_policy": "preserve",
-                "addresses": [
-                    {
-                     "address": "origin-proxy.{}".format(cdn_name)
-                    }
-                ],
-                "connection_timeout": 10,
-                "timeout_between_bytes": 20
-            }
-        ]
+    return ORIGIN_TEMPLATE.render(share=False, cdn_name=cdn_name)
 
 
 def azion_cdn_cache():
     """
         Create default CDN Cache settings.
     """
-    return  [
-      {
-        "name": "cache-1-hour-ignore-qs-cookies",
-        "browser_cache_settings": False,
-        "cdn_cache_settings": "override",
-        "cdn_cache_settings_maximum_ttl": 3600,
-        "cache_by_query_string": "ignore",
-        "enable_query_string_sort": False,
-        "cache_by_cookies": "ignore",
-      },
-      {
-        "name": "cache-5-minutes-ignore-qs-cookies",
-        "browser_cache_settings": False,
-        "cdn_cache_settings": "override",
-        "cdn_cache_settings_maximum_ttl": 300,
-        "cache_by_query_string": "ignore",
-        "enable_query_string_sort": False,
-        "cache_by_cookies": "ignore",
-      },
-      {
-        "name": "cache-bypass",
-        "browser_cache_settings": False,
-        "cdn_cache_settings": "bypass",
-        "cache_by_query_string": "ignore",
-        "cache_by_cookies": "ignore",
-      }
-    ]
+    return CACHE_TEMPLATE.render(share=False)
 
 
 def azion_cdn_rules():
     """
         Create default CDN Rules Engine config.
     """
-    return [
-          {
-            "path": "/images/",
-            "regex": False,
-            "protocol_policy": "http,https",
-            "gzip": True,
-            "behavior": "delivery",
-            "path_origin_name": "origin-static",
-            "cache_settings_name": "cache-1-hour-ignore-qs-cookies"
-          },
-          {
-            "path": "/fonts/",
-            "regex": False,
-            "protocol_policy": "http,https",
-            "gzip": True,
-            "behavior": "delivery",
-            "path_origin_name": "origin-static",
-            "cache_settings_name": "cache-1-hour-ignore-qs-cookies"
-          },
-          {
-            "path": "/css/",
-            "regex": False,
-            "protocol_policy": "http,https",
-            "gzip": True,
-            "behavior": "delivery",
-            "path_origin_name": "origin-static",
-            "cache_settings_name": "cache-5-minutes-ignore-qs-cookies"
-          },
-          {
-            "path": "/js/",
-            "regex": False,
-            "protocol_policy": "http,https",
-            "gzip": True,
-            "behavior": "delivery",
-            "path_origin_name": "origin-static",
-            "cache_settings_name": "cache-5-minutes-ignore-qs-cookies"
-          },
-          {
-            "path": "/proxy",
-            "regex": False,
-            "protocol_policy": "http",
-            "gzip": True,
-            "behavior": "acceleration",
-            "path_origin_name": "origin-proxy",
-            "cache_settings_name": "cache-bypass",
-            "forward_cookies": "all"
-          },
-          {
-            "path": "/site",
-            "regex": False,
-            "protocol_policy": "http",
-            "gzip": True,
-            "behavior": "acceleration",
-            "path_origin_name": "origin-default",
-            "cache_settings_name": "cache-bypass",
-            "forward_cookies": "all"
-          }
-    ]
+    return RULES_TEMPLATE.render(share=False)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import heapq
+import itertools
+import threading
+import time
+
+from .stats import LatencyWindow
+
+# Lower value is served first
+PRIORITIES = {
+    'interactive': 0,
+    'normal': 1,
+    'bulk': 2
+}
+
+
+class RequestScheduler(object):
+    """
+        Queue requests waiting for the rate budget. Requests are served by
+        priority class, and inside a class the flows (threads by default)
+        are served in turns, so a long job can not hold back a short one.
+    """
+
+    def __init__(self, rate_limiter, priorities=None):
+        """
+            :param RateLimiter rate_limiter: Budget shared by the requests.
+            :param dict priorities: Map of priority name to rank, lower is
+                served first. Defaults to PRIORITIES.
+        """
+        self.rate_limiter = rate_limiter
+        self.priorities = priorities or PRIORITIES
+
+        self._queue = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._flow_vtime = {}
+        self._class_vtime = dict((p, 0) for p in self.priorities)
+
+        self.served = dict((p, 0) for p in self.priorities)
+        self.wait_times = dict((p, LatencyWindow()) for p in self.priorities)
+
+    def _ticket(self, priority, flow):
+        """ Virtual start time of the next request of flow (fair queuing). """
+        vtime = max(self._flow_vtime.get((priority, flow), 0),
+                    self._class_vtime[priority]) + 1
+        self._flow_vtime[(priority, flow)] = vtime
+        return (self.priorities[priority], vtime, next(self._seq), priority)
+
+    def acquire(self, priority='normal', flow=None):
+        """
+            Block until the request is the first of the queue and the rate
+            budget allows it.
+
+            :param str priority: One of the priorities names.
+            :param flow: Key of the fair queuing flow, the current thread
+                by default.
+            :return: Seconds waited.
+            :rtype : Float
+        """
+        if priority not in self.priorities:
+            raise ValueError('Unknown priority: {}'.format(priority))
+        if flow is None:
+            flow = threading.current_thread().ident
+
+        start = time.time()
+        with self._cond:
+            ticket = self._ticket(priority, flow)
+            heapq.heappush(self._queue, ticket)
+
+            while True:
+                if self._queue[0] is ticket:
+                    wait = self.rate_limiter.wait_time()
+                    if wait <= 0 and self.rate_limiter.try_acquire():
+                        heapq.heappop(self._queue)
+                        self._class_vtime[priority] = ticket[1]
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait(max(wait, 0.01))
+                else:
+                    self._cond.wait(1.0)
+
+        waited = time.time() - start
+        self.served[priority] += 1
+        self.wait_times[priority].add(waited)
+        return waited
+
+    def depth(self):
+        """ Return the number of queued requests per priority. """
+        with self._cond:
+            depth = dict((p, 0) for p in self.priorities)
+            for t in self._queue:
+                depth[t[3]] += 1
+        return depth
+
+    def summary(self):
+        """ Return queue depth, served count and wait percentiles. """
+        depth = self.depth()
+        return dict((p, {
+            'depth': depth[p],
+            'served': self.served[p],
+            'wait_p50': self.wait_times[p].percentile(50),
+            'wait_p95': self.wait_times[p].percentile(95),
+        }) for p in self.priorities)
@@ -17,14 +17,20 @@
 
 # from __future__ import print_function
 
-import json
 import logging
-import requests
-from requests.structures import CaseInsensitiveDict
+import time
+import threading
+from contextlib import contextmanager
 from .version import __version__
+from .stats import RequestStats
+from .transport import RequestsTransport
+from .scheduler import RequestScheduler
 
 logger = logging.getLogger(__name__)
 
+# Header of the replies of azion.proxy, which rate limits for its clients
+PROXY_HEADER = 'X-Azion-Proxy'
+
 def _remove_null_values(dictionary):
     if isinstance(dictionary, dict):
         return dict([(k, v) for k, v in dictionary.items() if v is not None])
@@ -57,11 +63,23 @@ class APIService(object):
     # __version__ = __version__
 
     def __init__(self, url_api, token_auth=None, token_sess=None,
-                 username=None, password=None):
+                 username=None, password=None, timeout=None,
+                 rate_limiter=None, hedge_percentile=None,
+                 hedge_min_samples=20, transport=None, scheduler=None):
         """
             You can choose in setup initial authentication using username and
             password, or setup with Authorization HTTP token. If token_auth is set,
             username and password credentials must be ignored.
+
+            timeout is the default of every request, in seconds, as a number
+            or a (connect, read) tuple. rate_limiter is an optional
+            RateLimiter taken before each request. When hedge_percentile is
+            set, a GET slower than that percentile of the recent GET
+            latencies is sent again, and the first answer is used.
+            transport is the Transport sending the HTTP requests, a pooled
+            RequestsTransport by default. scheduler is the RequestScheduler
+            ordering the requests waiting for the rate budget, created from
+            rate_limiter when not set.
         """
         # self.__version__ = __version__
         self.url = url_api
@@ -72,6 +90,24 @@ class APIService(object):
         self.username = username
         self.password = password
 
+        self.write_buffer = None
+
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        if scheduler is None and rate_limiter is not None:
+            scheduler = RequestScheduler(rate_limiter)
+        self.scheduler = scheduler
+        self._local = threading.local()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.stats = RequestStats()
+        self.transport = transport or RequestsTransport()
+        # drop the rate limiter when the API turns out to be azion.proxy
+        self.proxy_drops_limiter = False
+        self._hedge_executor = None
+        self._hedge_workers = 0
+        self._hedge_inflight = 0
+        self._hedge_lock = threading.Lock()
 
     def set_token_auth(self, token_auth):
         if token_auth == 'YOUR AUTH TOKEN':
@@ -95,6 +131,40 @@ class APIService(object):
         }
         return config
 
+    """
+    Cassette record/replay
+    """
+    def record(self, path):
+        """
+            Record every request/response pair, with timings, to the
+            cassette file path until eject() is called.
+        """
+        from .cassette import RecordingTransport
+
+        self.transport = RecordingTransport(self.transport, path)
+        return self.transport
+
+    def replay(self, path, realtime=False):
+        """
+            Answer requests from the cassette file path, without network.
+            When realtime is set the recorded latencies are kept, otherwise
+            responses are served as fast as possible.
+        """
+        from .cassette import ReplayTransport
+
+        self.transport = ReplayTransport(path, realtime=realtime,
+                                         inner=self.transport)
+        return self.transport
+
+    def eject(self):
+        """ Stop recording or replaying and restore the previous transport. """
+        from .cassette import RecordingTransport, ReplayTransport
+
+        if isinstance(self.transport, (RecordingTransport, ReplayTransport)):
+            cassette = self.transport
+            cassette.close()
+            self.transport = cassette.inner
+
     """
     Session Token (#TODO)
     """
@@ -102,10 +172,121 @@ class APIService(object):
         """ #TODO: Ping session to check if token is not expired """
         return True
 
+    """ Request priority """
+    @contextmanager
+    def priority(self, name, override=True):
+        """
+            Send the requests made by the current thread inside the block
+            with the priority name: interactive, normal or bulk. When
+            override is False, a priority already set is kept.
+        """
+        previous = getattr(self._local, 'priority', None)
+        if override or previous is None:
+            self._local.priority = name
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def get_priority(self, default='normal'):
+        """ Return the priority of the requests of the current thread. """
+        return getattr(self._local, 'priority', None) or default
+
+    def _with_priority(self, fn, default='normal'):
+        """
+            Wrap fn to send its requests with the priority of the calling
+            thread, or default when it has none, from any thread. The
+            priority is set only while fn runs.
+        """
+        priority = self.get_priority(default)
+
+        def run(*args, **kwargs):
+            with self.priority(priority):
+                return fn(*args, **kwargs)
+        return run
+
     """ Request """
+    def _send(self, method, url, **kwargs):
+        """ Send a single HTTP request and record its latency. """
+        start = time.time()
+        try:
+            response = self.transport.request(method, url, **kwargs)
+        except Exception:
+            self.stats.record_request(method, time.time() - start, error=True)
+            raise
+
+        self.stats.record_request(method, time.time() - start)
+        return response
+
+    def _hedge_delay(self, method):
+        """ Return seconds to wait before hedging, or None to not hedge. """
+        if method != 'GET' or self.hedge_percentile is None:
+            return None
+        if len(self.stats.get_latency) < self.hedge_min_samples:
+            return None
+        return self.stats.get_latency.percentile(self.hedge_percentile)
+
+    def _send_hedged(self, delay, method, url, **kwargs):
+        """
+            Send the request and, when it has not answered after delay
+            seconds, send it again if the rate budget allows. Return the
+            first successful response.
+        """
+        executor = self._hedge_pool()
+        try:
+            return self._wait_hedged(executor, delay, method, url, **kwargs)
+        finally:
+            with self._hedge_lock:
+                self._hedge_inflight -= 1
+
+    def _hedge_pool(self):
+        """
+            Return the executor of hedged GETs, with two workers for each
+            hedged GET in flight, so no request waits in its queue while the
+            hedge delay runs. The executor is replaced by a larger one as
+            the number of concurrent callers grows.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._hedge_lock:
+            self._hedge_inflight += 1
+            needed = 2 * self._hedge_inflight
+            if self._hedge_workers < needed:
+                # the previous executor finishes its requests and is dropped
+                self._hedge_workers = max(needed, 2 * self._hedge_workers, 8)
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self._hedge_workers)
+            return self._hedge_executor
+
+    def _wait_hedged(self, executor, delay, method, url, **kwargs):
+        """ Send the request and its hedge on executor. """
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        pending = set([executor.submit(self._send, method, url, **kwargs)])
+        done, pending = wait(pending, timeout=delay)
+
+        if not done:
+            if self.rate_limiter is None or self.rate_limiter.try_acquire():
+                logger.debug("Hedging %s %s after %.3fs" % (method, url, delay))
+                self.stats.record_hedge()
+                pending.add(executor.submit(self._send, method, url,
+                                            **kwargs))
+
+        error = None
+        while done or pending:
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+                error = f.exception()
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+        raise error
+
     def request(self, method, url, headers={}, params=None, data=None,
                 files=None, data_json=None, accept_json=True, json_ver=None,
-                ua_default=True, **kwargs):
+                ua_default=True, timeout=None, priority=None, **kwargs):
         """
         Make a request to Rest API.
         @return Return response object.
@@ -114,6 +295,8 @@ class APIService(object):
         full_url = '%s/%s' % (self.url, url.strip('/'))
         input_headers = _remove_null_values(headers) if headers else {}
 
+        from requests.structures import CaseInsensitiveDict
+
         if ua_default:
             headers = CaseInsensitiveDict(
                 {'user-agent': 'azion-sdk-python-' + __version__})
@@ -143,25 +326,53 @@ class APIService(object):
         params = _cleanup_param_values(params)
         data = _remove_null_values(data)
         files = _remove_null_values(files)
+        if files:
+            kwargs['files'] = files
+
+        if timeout is None:
+            timeout = self.timeout
+
+        if self.scheduler is not None:
+            self.stats.record_wait(self.scheduler.acquire(
+                priority or self.get_priority()))
+        elif self.rate_limiter is not None:
+            self.stats.record_wait(self.rate_limiter.acquire())
 
         try:
-            response = requests.request(method=method, url=full_url,
-                                        headers=headers, params=params,
-                                        data=data, json=data_json, **kwargs)
+            delay = self._hedge_delay(method)
+            if delay is not None:
+                response = self._send_hedged(delay, method, full_url,
+                                             headers=headers, params=params,
+                                             data=data, json=data_json,
+                                             timeout=timeout, **kwargs)
+            else:
+                response = self._send(method, full_url,
+                                      headers=headers, params=params,
+                                      data=data, json=data_json,
+                                      timeout=timeout, **kwargs)
 
         except Exception:
             logger.error("ERROR requesting uri(%s) payload(%s)" % (url, data))
             raise
 
+        if self.proxy_drops_limiter and response.headers.get(PROXY_HEADER):
+            logger.debug("%s is azion.proxy, local rate limiter disabled" % (
+                self.url))
+            self.proxy_drops_limiter = False
+            self.rate_limiter = None
+            self.scheduler = None
+
         return response
 
     """ Generic Items methods """
     # [C]REATE - Create an Item
-    def create(self, path, payload=None, payload_json=None, json_ver=None):
+    def create(self, path, payload=None, payload_json=None, json_ver=None,
+               timeout=None):
         """ Create an Item. """
 
         response = self.request('POST', path, data=payload,
-                                json_ver=json_ver, data_json=payload_json)
+                                json_ver=json_ver, data_json=payload_json,
+                                timeout=timeout)
 
         if response.status_code >= 200 and response.status_code < 500:
             return response.json()
@@ -174,10 +385,11 @@ class APIService(object):
             return { 'error': '{}'.format(response.status_code)}
 
     # [R]EAD - GET config
-    def get(self, path, json_ver=None):
+    def get(self, path, json_ver=None, timeout=None, params=None):
         """ Return all content of Path in JSON format. """
 
-        response =  self.request('GET', path, json_ver=json_ver)
+        response =  self.request('GET', path, params=params,
+                                 json_ver=json_ver, timeout=timeout)
 
         if response.status_code >= 200 and response.status_code < 500:
             return response.json()
@@ -186,34 +398,73 @@ class APIService(object):
                                               response.text)}
 
     # [U]PDATE - config
-    ## Update fields
-    def update(self, path, payload):
-        """ #TODO: Update an object Item. """
+    def _write(self, method, path, payload, timeout=None):
+        """ Send an update (PATCH) or override (PUT) to path. """
 
-        response = self.request('PATCH', path, data=payload)
+        response = self.request(method, path, data=payload, timeout=timeout)
         if response.status_code >= 200 and response.status_code < 300:
             return response.json()
 
         return { 'error': '{:d}: {:s}'.format(response.status_code,
                                               response.text)}
 
+    def enable_write_buffer(self, max_delay=2.0, max_size=50):
+        """
+            Buffer update() and override() calls, merging the payloads sent
+            to the same path in a single request. While enabled, both
+            methods return a Future resolving to the server response.
+
+            :param float max_delay: Seconds to hold writes before flushing.
+            :param int max_size: Number of pending paths that forces a flush.
+            :return: The write buffer.
+            :rtype : WriteBuffer
+        """
+        from .buffer import WriteBuffer
+
+        if self.write_buffer is None:
+            self.write_buffer = WriteBuffer(self._write, max_delay=max_delay,
+                                            max_size=max_size)
+        return self.write_buffer
+
+    def disable_write_buffer(self):
+        """ Flush pending writes and send the next ones immediately. """
+        if self.write_buffer is not None:
+            self.write_buffer.close()
+            self.write_buffer = None
+
+    def flush(self):
+        """ Send the buffered writes. Return the number of requests sent. """
+        if self.write_buffer is None:
+            return 0
+        return self.write_buffer.flush()
+
+    ## Update fields
+    def update(self, path, payload, timeout=None):
+        """ #TODO: Update an object Item. """
+
+        if self.write_buffer is not None:
+            return self.write_buffer.submit('PATCH', path, payload, timeout)
+
+        return self._write('PATCH', path, payload, timeout)
+
     ## Override config
-    def override(self, path, payload):
+    def override(self, path, payload, timeout=None):
         """ #TODO: Update an object Item. """
 
-        response = self.request('PUT', path, data=payload)
-        if response.status_code >= 200 and response.status_code < 300:
-            return response.json()
+        if self.write_buffer is not None:
+            return self.write_buffer.submit('PUT', path, payload, timeout)
 
-        return { 'error': '{:d}: {:s}'.format(response.status_code,
-                                              response.text)}
+        return self._write('PUT', path, payload, timeout)
 
     # [D]ELETE an Item
-    def delete(self, path, force_purge=False):
+    def delete(self, path, force_purge=False, timeout=None):
         """ #TODO: Delete an object Item. """
 
-        response = self.request('DELETE', path)
+        response = self.request('DELETE', path, timeout=timeout)
         if response.status_code >= 200 and response.status_code < 300:
+            # 204 No Content
+            if not response.text:
+                return {}
             return response.json()
 
         return { 'error': '{:d}: {:s}'.format(response.status_code,
@@ -19,18 +19,30 @@
 # https://www.azion.com.br/developers/api/
 
 # from __future__ import print_function
+
+# Keep module loading cheap: requests, the sample config and thread pools
+# are imported on first use.
 import os
-import sys
 import logging
 import time
-import ast
-
-from service_api import APIService, ServiceException
+from urllib.parse import urlparse, parse_qsl
+
+from .service_api import APIService, ServiceException, ServiceInvalidArgument
+from .throttle import RateLimiter
+from .planner import Plan
+from .inventory import Inventory, origin_id
+from .lookup import shared_table
+from .snapshot import SnapshotWriter
+from .fetch import FetchSpec, OPTIONS
+from .sync import SyncEvent, SUB_RESOURCES, content_hash, diff_resources
+from .workers import run_bounded
 from .version import __version__
-import sample
 
 logger = logging.getLogger(__name__)
 
+# Items requested per page when listing certificates and firewalls
+LIST_PAGE_SIZE = 100
+
 
 def lookup_id_from_name(name, cfg):
     """
@@ -41,13 +53,61 @@ def lookup_id_from_name(name, cfg):
         :rtype : Integer
     """
     try:
-        cfg_id = filter(lambda c: c['name'] == name, cfg)[0]['id']
+        cfg_id = next(c['id'] for c in cfg if c['name'] == name)
     except:
         cfg_id = 0
 
     return cfg_id
 
 
+# Fields assigned by the API, removed before creating a copy
+SERVER_FIELDS = ('id', 'origin_id', 'origin_key')
+
+
+def _strip_server_fields(item):
+    return dict((k, v) for k, v in item.items() if k not in SERVER_FIELDS)
+
+
+def cdn_clone_payload(cdn_config, new_name, overrides=None):
+    """
+        Return the payload to create a copy of an expanded CDN config. The
+        server assigned fields are removed and the origin and cache settings
+        IDs of the rules are replaced by their names.
+
+        :param dict cdn_config: Expanded CDN config.
+        :param str new_name: Name of the copy.
+        :param dict overrides: Fields replaced in the payload.
+        :rtype : Dict
+    """
+    origins = [o for o in cdn_config.get('origins') or []
+               if isinstance(o, dict)]
+    caches = [c for c in cdn_config.get('cache_settings') or []
+              if isinstance(c, dict)]
+    origin_names = dict((origin_id(o), o.get('name')) for o in origins)
+    cache_names = dict((c.get('id'), c.get('name')) for c in caches)
+
+    rules = []
+    for r in cdn_config.get('rules_engine') or []:
+        if not isinstance(r, dict):
+            continue
+        rule = _strip_server_fields(r)
+        if 'path_origin_id' in rule:
+            rule['path_origin_name'] = origin_names.get(
+                rule.pop('path_origin_id'))
+        if rule.get('cache_settings_id') is not None:
+            rule['cache_settings_name'] = cache_names.get(
+                rule.pop('cache_settings_id'))
+        rules.append(rule)
+
+    payload = _strip_server_fields(cdn_config)
+    payload['name'] = new_name
+    payload['origins'] = [_strip_server_fields(o) for o in origins]
+    payload['cache_settings'] = [_strip_server_fields(c) for c in caches]
+    payload['rules_engine'] = rules
+    payload.update(overrides or {})
+    return payload
+
+
 class AzionAPI(APIService):
     """
         This is a abstraction layer of Azion API that handle many
@@ -55,20 +115,36 @@ class AzionAPI(APIService):
     """
     __version__ = __version__
 
-    def __init__(self, url_api=None, token=None, token_type='session'):
+    def __init__(self, url_api=None, token=None, token_type='session',
+                 timeout=None, hedge_percentile=None, transport=None,
+                 rate_limit=20, rate_limiter=None):
         """
             Construct AzionAPI object to interact with API.
 
             :param str url_api: URL of Azion's API.
             :param str token: Session Token to interact with the API.
             :param str token_type: Type of token.
+            :param timeout: Default timeout of requests in seconds, a number
+                or a (connect, read) tuple.
+            :param float hedge_percentile: Percentile of recent GET latency
+                after which a GET is sent again. Disabled when None.
+            :param Transport transport: HTTP transport, the requests based
+                RequestsTransport by default.
+            :param int rate_limit: Max requests per minute sent by this
+                client, None disables the local limiter. This limiter is
+                dropped on the first reply of azion.proxy, which already
+                throttles.
+            :param RateLimiter rate_limiter: Limiter shared with other
+                clients, used instead of rate_limit.
         """
 
         if url_api is None:
             url_api = 'https://api.azion.net'
 
         self.routes = {
-            'cdn_config': '/content_delivery/configurations'
+            'cdn_config': '/content_delivery/configurations',
+            'digital_certificates': '/digital_certificates',
+            'firewall': '/edge_firewall'
         }
         self.status = {
             'exists': 2000,
@@ -82,7 +158,15 @@ class AzionAPI(APIService):
         }
 
         # API throtle - HTTP 429 https://www.azion.com.br/developers/api/
-        self.throtle_limit_min = 20
+        own_limiter = rate_limiter is None and rate_limit is not None
+        if rate_limiter is not None:
+            rate_limit = rate_limiter.limit
+        elif rate_limit is not None:
+            rate_limiter = RateLimiter(rate_limit, 60)
+        self.throtle_limit_min = rate_limit
+
+        # Seconds to cache Certificate and Firewall names
+        self.lookup_ttl = 300
 
         if token_type == 'session':
             if token is None:
@@ -100,7 +184,12 @@ class AzionAPI(APIService):
                     raise ('Unable to get Base64 token from env AZION_BASE64')
 
         # force to use session token
-        APIService.__init__(self, url_api, token_sess=token)
+        APIService.__init__(self, url_api, token_sess=token, timeout=timeout,
+                            rate_limiter=rate_limiter,
+                            hedge_percentile=hedge_percentile,
+                            transport=transport)
+        # behind azion.proxy, which throttles, drop the default limiter
+        self.proxy_drops_limiter = own_limiter
 
     # Get Attributes functions
     def get_attr_status_message(self, status_id):
@@ -110,11 +199,11 @@ class AzionAPI(APIService):
                 return m
 
     # AZION CDN Operations / abstraction
-    def _get(self, path):
+    def _get(self, path, params=None):
         """
             Wrapper of get() request to enforce some common parameters.
         """
-        return self.get(path, json_ver=1)
+        return self.get(path, json_ver=1, params=params)
 
     def _create(self, path, payload):
         """
@@ -122,6 +211,74 @@ class AzionAPI(APIService):
         """
         return self.create(path, payload_json=payload, json_ver=1)
 
+    # Digital Certificates and Firewall
+    def _get_list(self, route):
+        """
+            Return the list of items of route, following the pages of the
+            paginated results.
+
+            :return: Return the tuple of items list and status.
+        """
+        items = []
+        params = {'page_size': LIST_PAGE_SIZE}
+        seen = []
+        while params not in seen:
+            seen.append(params)
+            page = self._get(route, params=params)
+            if isinstance(page, list):
+                return items + page, self.status['ok']
+            if not isinstance(page, dict) or 'results' not in page:
+                return page, self.status['bad_request']
+
+            items.extend(page['results'] or [])
+            next_url = (page.get('links') or {}).get('next')
+            if not next_url:
+                break
+            params = dict(parse_qsl(urlparse(next_url).query))
+
+        return items, self.status['ok']
+
+    def get_certificates(self):
+        """
+            Return the list of Digital Certificates.
+
+            :return: Return the tuple of certificates list and status.
+        """
+        return self._get_list(self.routes['digital_certificates'])
+
+    def get_firewalls(self):
+        """
+            Return the list of Firewall rule sets.
+
+            :return: Return the tuple of firewalls list and status.
+        """
+        return self._get_list(self.routes['firewall'])
+
+    def _lookup(self, kind, name):
+        """
+            Return the ID of name in the table of kind shared by this
+            account, or 0 if not found. The table is fetched with this
+            client.
+        """
+        table = shared_table((self.url, self.token_sess, kind),
+                             ttl=self.lookup_ttl)
+        return table.resolve(
+            name, lambda: self._get_list(self.routes[kind])[0]) or 0
+
+    def lookup_certificate(self, name):
+        """
+            Return the ID of the Digital Certificate name, or 0 if not found.
+            Names are resolved from a cached table refreshed in bulk.
+        """
+        return self._lookup('digital_certificates', name)
+
+    def lookup_firewall(self, name):
+        """
+            Return the ID of the Firewall name, or 0 if not found. Names are
+            resolved from a cached table refreshed in bulk.
+        """
+        return self._lookup('firewall', name)
+
     # CDN abstraction
     def _cdn_origins_config(self, cdn_config):
         """
@@ -213,18 +370,188 @@ class AzionAPI(APIService):
             :return: Return the Dict with CDN configuration.
             :rtype : Dict
         """
-        if option == 'all':
-            return self._cdn_config_expand(cdn_config)
-        elif option == 'origin':
-            return self._cdn_origins_config(cdn_config)
-        elif option == 'cache':
-            return self._cdn_cache_config(cdn_config)
-        elif option == 'rules':
-            return self._cdn_rules_config(cdn_config)
-        elif option == 'payload_base':
+        if option == 'payload_base':
             return self._cdn_payload_base(cdn_config)
 
-    def get_cdn_config(self, option='all', cdn_id=None, cdn_name=None):
+        spec = FetchSpec.from_option(option)
+        if spec is None:
+            raise ServiceInvalidArgument('Unknown option: {}'.format(option))
+        return self._cdn_fetch(cdn_config, spec)
+
+    def _cdn_fetch(self, cdn_config, spec):
+        """
+            Fetch the sub-resources of the spec and return the CDN config
+            with only the fields of the spec.
+
+            :param dict cdn_config: base CDN config.
+            :param FetchSpec spec: Fields to fetch.
+            :return: Return the Dict with CDN configuration.
+            :rtype : Dict
+        """
+        if not isinstance(cdn_config, dict):
+            return {}
+
+        for kind in spec.endpoints():
+            path = '{:s}/{:d}/{:s}'.format(self.routes['cdn_config'],
+                                           cdn_config['id'], kind)
+            cdn_config[kind] = self._get(path)
+
+        return spec.select(cdn_config)
+
+    def fetch(self, fields, cdn_id=None, cdn_name=None, concurrency=1):
+        """
+            Yield the CDN configs with only the fields requested. Only the
+            endpoints needed by the fields are called, with one request to
+            list the CDNs and up to concurrency CDNs fetched at the same time.
+
+            :param fields: List of fields or FetchSpec, eg.
+                ['cname', 'rules_engine.path', 'origins.addresses'].
+            :param int cdn_id: Fetch only this CDN.
+            :param str cdn_name: Fetch only this CDN.
+            :param int concurrency: CDNs fetched at the same time.
+            :return: Generator of CDN config dicts.
+        """
+        spec = fields if isinstance(fields, FetchSpec) else FetchSpec(fields)
+
+        if cdn_id is None and cdn_name is None:
+            priority = 'bulk'
+        else:
+            priority = 'interactive'
+
+        # priority is set around the requests only, not while the caller
+        # holds the generator
+        with self.priority(priority, override=False):
+            if cdn_id is not None:
+                c = self._get('{:s}/{:d}'.format(self.routes['cdn_config'],
+                                                 cdn_id))
+                cfg_all = [c] if isinstance(c, dict) and 'id' in c else []
+            else:
+                cfg_all = self._get(self.routes['cdn_config'])
+                if not isinstance(cfg_all, list):
+                    raise ServiceException('Unable to list CDNs: {}'.format(
+                        cfg_all))
+                if cdn_name is not None:
+                    cfg_all = [c for c in cfg_all if c['name'] == cdn_name]
+
+        fetch_cdn = self._with_priority(lambda c: self._cdn_fetch(c, spec),
+                                        priority)
+        for cfg in run_bounded(fetch_cdn, cfg_all, concurrency):
+            yield cfg
+
+    # Dry-run planning
+    def _plan(self):
+        """ Return an empty Plan using the client rate limit and latency. """
+        latency = self.stats.latency.percentile(50)
+        return Plan(rate_limit=self.throtle_limit_min, period=60.0,
+                    latency=latency or 0.3)
+
+    def _plan_cdn_expand(self, plan, cdn_path, option, depends_on, name):
+        """ Add the sub-resources GETs of option to plan. """
+        spec = FetchSpec.from_option(option)
+        for sub in spec.endpoints() if spec is not None else []:
+            plan.add('GET', '{:s}/{:s}'.format(cdn_path, sub),
+                     depends_on=[depends_on],
+                     description='{:s} of {:s}'.format(sub, name))
+
+    def plan_get_cdn_config(self, option='all', cdn_id=None, cdn_name=None,
+                            cdn_count=None):
+        """
+            Return the Plan of calls made by get_cdn_config(), without
+            calling the API.
+
+            :param str option: Same as get_cdn_config().
+            :param int cdn_id: Same as get_cdn_config().
+            :param str cdn_name: Same as get_cdn_config().
+            :param int cdn_count: Number of CDNs of the account, required
+                when planning the export of all CDNs.
+            :return: Calls in dependency order.
+            :rtype : Plan
+        """
+        if cdn_id is None and cdn_name is None and cdn_count is None:
+            raise ServiceInvalidArgument('cdn_count is required to plan the '
+                                         'export of all CDNs')
+
+        plan = self._plan()
+        base = self.routes['cdn_config']
+
+        if cdn_id is not None:
+            path = '{:s}/{:d}'.format(base, cdn_id)
+            idx = plan.add('GET', path, description='CDN {:d}'.format(cdn_id))
+            self._plan_cdn_expand(plan, path, option, idx,
+                                  'CDN {:d}'.format(cdn_id))
+
+        elif cdn_name is not None:
+            idx = plan.add('GET', base, description='list CDNs')
+            self._plan_cdn_expand(plan, base + '/{id}', option, idx,
+                                  'CDN {:s}'.format(cdn_name))
+
+        else:
+            idx = plan.add('GET', base, description='list CDNs')
+            for i in range(cdn_count):
+                self._plan_cdn_expand(plan, base + '/{id}', 'all', idx,
+                                      'CDN #{:d}'.format(i + 1))
+
+        return plan
+
+    def plan_create_cdn(self, cdn_name, cdn_payload=None):
+        """
+            Return the Plan of calls made by create_cdn(), without calling
+            the API. Missing parts of the payload are planned from the
+            sample config, as create_cdn() does.
+
+            :return: Calls in dependency order.
+            :rtype : Plan
+        """
+        import ast
+        from . import sample
+
+        plan = self._plan()
+        base = self.routes['cdn_config']
+
+        if cdn_payload is None:
+            cdn_payload = sample.azion_cdn(cdn_name)
+        if not isinstance(cdn_payload, dict):
+            cdn_payload = ast.literal_eval(cdn_payload)
+
+        idx_list = plan.add('GET', base, description='check CDN exists')
+        # name lookups list the whole resource, unless cached
+        if 'digital_certificate_name' in cdn_payload:
+            idx_list = plan.add('GET', self.routes['digital_certificates'],
+                                depends_on=[idx_list],
+                                description='lookup certificate {:s}'.format(
+                                    cdn_payload['digital_certificate_name']))
+        idx_cdn = plan.add('POST', base, depends_on=[idx_list],
+                           description='create CDN {:s}'.format(cdn_name))
+        path = base + '/{id}'
+
+        items = []
+        for sub, default in (('origins', sample.azion_cdn_origin(cdn_name)),
+                             ('cache_settings', sample.azion_cdn_cache())):
+            for o in cdn_payload.get(sub, default):
+                items.append(plan.add('POST', '{:s}/{:s}'.format(path, sub),
+                                      depends_on=[idx_cdn],
+                                      description='create {:s} {:s}'.format(
+                                          sub, o.get('name', ''))))
+
+        # rules lookup origins and cache settings ids, keep the order
+        depends_on = [idx_cdn] + items
+        firewall_listed = False
+        for r in cdn_payload.get('rules_engine', sample.azion_cdn_rules()):
+            if 'firewall_name' in r and not firewall_listed:
+                firewall_listed = True
+                depends_on = [plan.add('GET', self.routes['firewall'],
+                                       depends_on=depends_on,
+                                       description='lookup firewall '
+                                       '{:s}'.format(r['firewall_name']))]
+            idx = plan.add('POST', path + '/rules_engine', depends_on=depends_on,
+                           description='create rule {:s}'.format(
+                               r.get('path', '')))
+            depends_on = [idx]
+
+        return plan
+
+    def get_cdn_config(self, option='all', cdn_id=None, cdn_name=None,
+                       dry_run=False, cdn_count=None):
         """
             Return the CDN configuration, can lookup by ID or Name.
 
@@ -232,11 +559,33 @@ class AzionAPI(APIService):
                 origin, cache and rules.
             :param int cdn_id: CDN ID to get the configuration.
             :param str cdn_name: CDN Name to get the configuration.
+            :param bool dry_run: Return the Plan of calls instead of calling
+                the API. See plan_get_cdn_config().
+            :param int cdn_count: Number of CDNs of the account, required by
+                dry_run when exporting all CDNs.
             :return: Return the Dict with configuration when cdn_id or cdn_name
                 is provided. When leaves default values of arguments, all the
                 configuration is returned in array format.
             :rtype : Dict
         """
+        if dry_run:
+            return (self.plan_get_cdn_config(option=option, cdn_id=cdn_id,
+                                             cdn_name=cdn_name,
+                                             cdn_count=cdn_count),
+                    self.status['ok'])
+
+        # lookups are interactive, exports of all CDNs are bulk traffic
+        if cdn_id is None and cdn_name is None:
+            priority = 'bulk'
+        else:
+            priority = 'interactive'
+
+        with self.priority(priority, override=False):
+            return self._get_cdn_config(option=option, cdn_id=cdn_id,
+                                        cdn_name=cdn_name)
+
+    def _get_cdn_config(self, option='all', cdn_id=None, cdn_name=None):
+        """ Return the CDN configuration. See get_cdn_config(). """
 
         try:
             status = self.status['not_found']
@@ -274,16 +623,9 @@ class AzionAPI(APIService):
                 if not isinstance(cfg_all, list):
                     return cfg_all, 401
 
-                count = 1
+                # API throtle is handled by self.scheduler
                 for c in cfg_all:
-                    if count > (self.throtle_limit_min - 3):
-                        #print ("Avoiding Throtle {} of {}. Waiting 50s".format(count,
-                        #                                self.throtle_limit_min))
-                        time.sleep(60)
-                        count = 0
-
                     cfg.append(self._cdn_config_expand(c))
-                    count += 3
 
                 if len(cfg) > 0:
                     status = self.status['ok']
@@ -293,23 +635,247 @@ class AzionAPI(APIService):
         except ServiceException as e:
             return {'{}'.format(e)}, self.status['server_error']
 
+    def iter_cdn_config(self, concurrency=1):
+        """
+            Yield the expanded configuration of every CDN as soon as it is
+            expanded, up to concurrency CDNs at the same time. The order
+            follows completion, not the CDN list.
+
+            :param int concurrency: CDNs expanded at the same time.
+            :return: Generator of CDN config dicts.
+        """
+        return self.fetch(OPTIONS['all'], concurrency=concurrency)
+
+    def snapshot(self, path, concurrency=1):
+        """
+            Write the expanded configuration of every CDN to the snapshot
+            file path, streaming one CDN at a time. Read it back with
+            azion.snapshot.SnapshotReader; its CDN configs can be restored
+            with clone_cdn().
+
+            :param str path: Snapshot file to write.
+            :param int concurrency: CDNs expanded at the same time.
+            :return: Number of CDNs written.
+            :rtype : Integer
+        """
+        with SnapshotWriter(path) as snap:
+            for cfg in self.iter_cdn_config(concurrency=concurrency):
+                snap.write(cfg)
+            return len(snap)
+
+    def get_inventory(self, inventory=None, cdn_id=None):
+        """
+            Return an Inventory indexing the expanded CDN configurations.
+            When cdn_id is set, only that CDN is fetched again and updated
+            in inventory.
+
+            :param Inventory inventory: Inventory to update, a new one when
+                None.
+            :param int cdn_id: ID of the CDN to refresh.
+            :return: The inventory.
+            :rtype : Inventory
+        """
+        if inventory is None:
+            inventory = Inventory()
+
+        if cdn_id is not None:
+            cfg, status = self.get_cdn_config(cdn_id=cdn_id)
+            if status == self.status['ok']:
+                inventory.add(cfg)
+            elif status == self.status['not_found']:
+                inventory.remove(cdn_id)
+            return inventory
+
+        cfg, status = self.get_cdn_config()
+        if isinstance(cfg, list):
+            for c in cfg:
+                inventory.add(c)
+        return inventory
+
+    def sync(self, state, max_age=None):
+        """
+            Sync the state with the account, yielding SyncEvent for what was
+            added, changed or removed since the previous sync. Only the CDN
+            list is fetched, a CDN is expanded when it is new, its base
+            record changed, it was expanded more than max_age seconds ago or
+            one of its sub-resources could not be fetched last time.
+
+            :param SyncState state: State of the previous sync, updated.
+            :param float max_age: Max seconds between expansions of a CDN,
+                never expanded again when unchanged if None.
+            :return: Generator of SyncEvent.
+        """
+        # priority is set around the requests only, not while the caller
+        # holds the generator
+        with self.priority('bulk', override=False):
+            cfg_all = self._get(self.routes['cdn_config'])
+        if not isinstance(cfg_all, list):
+            raise ServiceException('Unable to list CDNs: {}'.format(cfg_all))
+
+        seen = set()
+        for c in cfg_all:
+            seen.add(c['id'])
+            for e in self._sync_cdn(state, c, max_age):
+                yield e
+
+        for cdn_id in [i for i in state.cdns if i not in seen]:
+            prev = state.cdns.pop(cdn_id)
+            for kind, hashes in prev['resources'].items():
+                for rid in hashes:
+                    yield SyncEvent('removed', kind, cdn_id, rid, None)
+            yield SyncEvent('removed', 'cdn', cdn_id, cdn_id, None)
+
+    def _sync_cdn(self, state, c, max_age):
+        """
+            Sync a CDN of the list with its state entry. The CDN is marked
+            incomplete when a sub-resource could not be fetched, and is
+            expanded again by the next sync.
+
+            :return: List of SyncEvent.
+        """
+        cdn_id = c['id']
+        base_hash = content_hash(c)
+        prev = state.cdns.get(cdn_id)
+        now = time.time()
+
+        if prev is not None and prev['hash'] == base_hash and \
+                prev.get('complete', True) and (
+                    max_age is None or now - prev['fetched_at'] < max_age):
+            return []
+
+        events = []
+        if prev is None:
+            events.append(SyncEvent('added', 'cdn', cdn_id, cdn_id, c))
+            prev = {'resources': {}}
+        elif prev['hash'] != base_hash:
+            events.append(SyncEvent('changed', 'cdn', cdn_id, cdn_id, c))
+
+        with self.priority('bulk', override=False):
+            cfg = self._cdn_config_expand(dict(c))
+
+        complete = True
+        resources = dict(prev['resources'])
+        for kind in SUB_RESOURCES:
+            items = cfg.get(kind)
+            if not isinstance(items, list):
+                # keep the previous hashes on errors
+                complete = False
+                continue
+            resources[kind], kind_events = diff_resources(
+                cdn_id, kind, prev['resources'].get(kind, {}), items)
+            events.extend(kind_events)
+
+        state.cdns[cdn_id] = {'hash': base_hash, 'fetched_at': now,
+                              'complete': complete, 'resources': resources}
+        return events
+
     def _cdn_check_payload(self, cdn_name, cdn_payload):
         """
             # TODO: Check CDN config payload is valid.
         """
         return True
 
-    def _create_cdn_recursive(self, cdn_payload):
+    def _create_cdn_items(self, cdn_id, kind, items, concurrency=1):
+        """
+            Create the sub-resources items of kind (origins, cache_settings)
+            in the CDN, up to concurrency at the same time.
+
+            :return: The list of created items, in the order of items.
+            :rtype : List
+        """
+        path = '{:s}/{:d}/{:s}'.format(self.routes['cdn_config'], cdn_id, kind)
+
+        # workers send with the priority of the calling thread
+        create = self._with_priority(lambda o: self._create(path, o))
+        return list(run_bounded(create, items, concurrency, ordered=True))
+
+    def _create_cdn_rules(self, cdn_config, rules):
+        """
+            Create the Rules Engine of the CDN, in order, resolving
+            path_origin_name and cache_settings_name to the IDs of the
+            origins and cache settings of cdn_config, and firewall_name to
+            the Firewall ID.
+
+            :return: Return the tuple of cdn_config and status.
+        """
+        cdn_config['rules_engine'] = []
+        re = cdn_config['rules_engine']
+        path = '{:s}/{:d}/rules_engine'.format(self.routes['cdn_config'],
+                                               cdn_config['id'])
+
+        origins = dict((o.get('name'), origin_id(o))
+                       for o in cdn_config.get('origins', [])
+                       if isinstance(o, dict))
+        caches = dict((c.get('name'), c.get('id'))
+                      for c in cdn_config.get('cache_settings', [])
+                      if isinstance(c, dict))
+
+        for r in rules:
+            # TODO: check if exists, change it?!
+            r = dict(r)
+            try:
+                r['path_origin_id'] = origins.get(r['path_origin_name']) or 0
+
+                if r['path_origin_id'] == 0:
+                    re.append({"error": "{} Origin not found".format(r['path'])})
+                    continue
+
+                del r['path_origin_name']
+            except Exception as e:
+                re.append({"error": "create.rules_engine: {}".format(e)})
+                continue
+
+            if 'cache_settings_name' in r:
+                r['cache_settings_id'] = caches.get(r['cache_settings_name']) or 0
+                if r['cache_settings_id'] == 0:
+                    continue
+
+                del r['cache_settings_name']
+
+            if 'firewall_name' in r:
+                r['firewall_id'] = self.lookup_firewall(r['firewall_name'])
+                if r['firewall_id'] == 0:
+                    re.append({"error": "{} Firewall not found".format(r['path'])})
+                    continue
+
+                del r['firewall_name']
+
+            try:
+                r_resp = self._create(path, r)
+                re.append(r_resp)
+                if 'error' in r_resp:
+                    return (cdn_config, self.status['ok'])
+            except Exception as e:
+                return {'error': '{}'.format(e)}, self.status['not_found']
+
+        return (cdn_config, self.status['ok'])
+
+    def _create_cdn_recursive(self, cdn_payload, concurrency=1):
         """
             Create the CDN recursively:
             1. CDN
             2. origins
             3. Cache Settings
             4. Rules Engine
+
+            Origins and Cache Settings are created up to concurrency at the
+            same time, Rules Engine is created in the payload order.
+            digital_certificate_name of the CDN and firewall_name of the
+            rules are resolved to IDs from cached lookup tables.
         """
+        from . import sample
 
         payload_base = self._cdn_config_callback(cdn_payload, option='payload_base')
         path = '{:s}'.format(self.routes['cdn_config'])
+
+        # Certificate
+        if 'digital_certificate_name' in payload_base:
+            name = payload_base.pop('digital_certificate_name')
+            payload_base['digital_certificate'] = self.lookup_certificate(name)
+            if payload_base['digital_certificate'] == 0:
+                return ({'error': '{} Certificate not found'.format(name)},
+                        self.status['not_found'])
+
         cdn_config = self._create(path, payload_base)
 
         if (not isinstance(cdn_config, dict)):
@@ -324,83 +890,78 @@ class AzionAPI(APIService):
         except Exception as e:
             return {'error': '{}'.format(cdn_config, e)}, self.status['exists']
 
-        if ('origins' in cdn_payload):
-            cdn_config['origins'] = []
-            path = '{:s}/{:d}/origins'.format(self.routes['cdn_config'],
-                                              cdn_config['id'])
-
-            for o in cdn_payload['origins']:
-                try:
-                    cdn_config['origins'].append(self._create(path, o))
-                except Exception as e:
-                    return {'error': '{:s}'.format(e)}, self.status['not_found']
-
         # Cache
         if ('cache_settings' not in cdn_payload):
             cdn_payload['cache_settings'] = sample.azion_cdn_cache()
-        if ('cache_settings' in cdn_payload):
-            cdn_config['cache_settings'] = []
-            path = '{:s}/{:d}/cache_settings'.format(self.routes['cdn_config'],
-                                              cdn_config['id'])
 
-            for o in cdn_payload['cache_settings']:
-                # TODO: check if exists, change it?!
-                try:
-                    cdn_config['cache_settings'].append(self._create(path, o))
-                except Exception as e:
-                    return {'error': '{:s}'.format(e)}, self.status['not_found']
+        for kind in ('origins', 'cache_settings'):
+            # TODO: check if exists, change it?!
+            try:
+                cdn_config[kind] = self._create_cdn_items(
+                    cdn_config['id'], kind, cdn_payload[kind],
+                    concurrency=concurrency)
+            except Exception as e:
+                return {'error': '{}'.format(e)}, self.status['not_found']
 
         # Rules
         if ('rules_engine' not in cdn_payload):
             cdn_payload['rules_engine'] = sample.azion_cdn_rules()
-        if ('rules_engine' in cdn_payload):
-            cdn_config['rules_engine'] = []
-            re = cdn_config['rules_engine']
-            path = '{:s}/{:d}/rules_engine'.format(self.routes['cdn_config'],
-                                              cdn_config['id'])
-
-            for r in cdn_payload['rules_engine']:
-                # TODO: check if exists, change it?!
-                try:
-                    r['path_origin_id'] = lookup_id_from_name(r['path_origin_name'],
-                                                              cdn_config['origins'])
 
-                    if r['path_origin_id'] == 0:
-                        re.append({"error": "{} Origin not found".format(r['path'])})
-                        continue
+        return self._create_cdn_rules(cdn_config, cdn_payload['rules_engine'])
 
-                    del r['path_origin_name']
-                except Exception as e:
-                    re.append({"error": "create.rules_engine: {}".format(e)})
-                    continue
-
-                if 'cache_settings_name' in r:
-                    try:
-                        r['cache_settings_id'] = lookup_id_from_name(r['cache_settings_name'],
-                                                                     cdn_config['cache_settings'])
-                        if r['cache_settings_id'] == 0:
-                            continue
+    def clone_cdn(self, source, new_name, overrides=None, concurrency=4):
+        """
+            Create a copy of a CDN with a new name.
+
+            :param source: ID or name of the CDN to copy, or its expanded
+                configuration (eg. from get_cdn_config() or a snapshot).
+            :param str new_name: Name of the new CDN.
+            :param dict overrides: Fields replaced in the new CDN payload,
+                eg. cname. Sub-resources lists can be replaced too.
+            :param int concurrency: Origins and Cache Settings created at
+                the same time, still bound by the rate limit.
+            :return: Return the tuple of new CDN config and status.
+        """
 
-                        del r['cache_settings_name']
-                    except:
-                        continue
+        try:
+            cfg_all = self._get(self.routes['cdn_config'])
+            if not isinstance(cfg_all, list):
+                return cfg_all, self.status['bad_request']
 
-                try:
-                    r_resp = self._create(path, r)
-                    cdn_config['rules_engine'].append(r_resp)
-                    if 'error' in r_resp:
-                        return (cdn_config, self.status['ok'])
-                except Exception as e:
-                    return {'error': '{:s}'.format(e)}, self.status['not_found']
+            for c in cfg_all:
+                if c['name'] == new_name:
+                    return c, self.status['exists']
+
+            if isinstance(source, dict):
+                source_config = source
+            elif isinstance(source, int):
+                source_config, status = self.get_cdn_config(cdn_id=source)
+                if status != self.status['ok']:
+                    return source_config, status
+            else:
+                source_config = None
+                for c in cfg_all:
+                    if c['name'] == source:
+                        source_config = self._cdn_config_expand(c)
+                        break
+                if source_config is None:
+                    return {}, self.status['not_found']
 
-        return (cdn_config, self.status['ok'])
+            cdn_payload = cdn_clone_payload(source_config, new_name, overrides)
+            return self._create_cdn_recursive(cdn_payload,
+                                              concurrency=concurrency)
 
+        except ServiceException as e:
+            return {'{}'.format(e)}, self.status['server_error']
 
-    def _create_cdn(self, cdn_name, cdn_payload=None):
+    def _create_cdn(self, cdn_name, cdn_payload=None, concurrency=1):
         """
         Callback CDN creation, generate a sample config when payload is
         not defined.
         """
+        import ast
+        from . import sample
+
         # If payload is not provided, generate from a sample
         if (cdn_payload is None):
             cdn_payload = sample.azion_cdn(cdn_name)
@@ -409,20 +970,64 @@ class AzionAPI(APIService):
             cdn_payload = ast.literal_eval(cdn_payload)
 
         if isinstance(cdn_payload, dict):
-            return self._create_cdn_recursive(cdn_payload)
+            return self._create_cdn_recursive(cdn_payload,
+                                              concurrency=concurrency)
 
         return {'EROOR _create_cdn()'}, self.status['not_found']
 
-    def create_cdn(self, cdn_name, cdn_payload=None):
+    def create_cdns(self, payloads, concurrency=1):
+        """
+            Create a CDN from each payload, consuming payloads lazily, eg.
+            from azion.templates.generate_payloads(). The CDN list is
+            fetched once, and at most 2 * concurrency payloads are held.
+
+            :param payloads: Iterable of CDN payload dicts, with name.
+            :param int concurrency: CDNs created at the same time.
+            :return: Generator of (cdn_name, (cdn_config, status)), in the
+                payloads order.
+        """
+        # priority is set around the requests only, not while the caller
+        # holds the generator
+        with self.priority('bulk', override=False):
+            cfg_all = self._get(self.routes['cdn_config'])
+        if not isinstance(cfg_all, list):
+            raise ServiceException('Unable to list CDNs: {}'.format(cfg_all))
+        existing = dict((c['name'], c) for c in cfg_all)
+
+        def create(payload):
+            name = payload['name']
+            if name in existing:
+                return name, (existing[name], self.status['exists'])
+            if not self._cdn_check_payload(name, payload):
+                return name, ({'error': 'Malformed payload'},
+                              self.status['bad_request'])
+            try:
+                return name, self._create_cdn_recursive(payload)
+            except ServiceException as e:
+                return name, ({'{}'.format(e)}, self.status['server_error'])
+
+        create = self._with_priority(create, 'bulk')
+        for result in run_bounded(create, payloads, concurrency, ordered=True):
+            yield result
+
+    def create_cdn(self, cdn_name, cdn_payload=None, dry_run=False,
+                   concurrency=1):
         """
             Wrapper to create the CDN. Return it's configuration.
 
             :param str cdn_name: The operation to be done. Could be all, origin,
                 cache and rules.
             :param dict cdn_payload: CDN ID to get the configuration.
+            :param bool dry_run: Return the Plan of calls instead of calling
+                the API. See plan_create_cdn().
+            :param int concurrency: Origins and cache settings created at
+                the same time.
             :return: Return the Dict with configuration recently created.
             :rtype : Dict
         """
+        if dry_run:
+            return (self.plan_create_cdn(cdn_name, cdn_payload),
+                    self.status['ok'])
 
         try:
             status = self.status['not_found']
@@ -444,7 +1049,25 @@ class AzionAPI(APIService):
             if not self._cdn_check_payload(cdn_name, cdn_payload):
                 return {'error': 'Malformed payload'}, self.status['bad_request']
 
-            return self._create_cdn(cdn_name, cdn_payload)
+            return self._create_cdn(cdn_name, cdn_payload,
+                                    concurrency=concurrency)
+
+        except ServiceException as e:
+            return {'{}'.format(e)}, self.status['server_error']
+
+    def delete_cdn(self, cdn_id):
+        """
+            Delete the CDN.
+
+            :param int cdn_id: ID of the CDN to delete.
+            :return: Return the tuple of API answer and status.
+        """
+        try:
+            path = '{:s}/{:d}'.format(self.routes['cdn_config'], cdn_id)
+            resp = self.delete(path)
+            if isinstance(resp, dict) and 'error' in resp:
+                return resp, self.status['bad_request']
+            return resp, self.status['ok']
 
         except ServiceException as e:
             return {'{}'.format(e)}, self.status['server_error']
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Snapshot file of expanded CDN configs:
+#
+#   MAGIC | record... | index | trailer
+#
+# Every record is zlib compressed JSON. Sub-resources (origins, cache
+# settings, rules) are stored once per distinct content as blob records,
+# without their IDs; a CDN record keeps the IDs and the blob numbers. The
+# first CDN record is the zlib preset dictionary of the next ones, which
+# share most of its keys and values. The index maps CDN ids and names to
+# their record, and the trailer has the offset and size of the index, so a
+# single CDN is read without decoding the others.
+
+import copy
+import json
+import struct
+import threading
+import zlib
+
+from .sync import SUB_RESOURCES, content_hash
+
+MAGIC = b'AZSNAP1\n'
+TRAILER = struct.Struct('>QI')
+
+# Fields kept in the CDN record, so equal sub-resources share a blob
+IDENTITY_FIELDS = ('id', 'origin_id', 'origin_key')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _pack(obj, level, zdict=None):
+    if zdict is None:
+        return zlib.compress(_dumps(obj), level)
+    c = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS,
+                         zlib.DEF_MEM_LEVEL, zlib.Z_DEFAULT_STRATEGY, zdict)
+    return c.compress(_dumps(obj)) + c.flush()
+
+
+def _unpack(data, zdict=None):
+    if zdict is None:
+        raw = zlib.decompress(data)
+    else:
+        d = zlib.decompressobj(zlib.MAX_WBITS, zdict)
+        raw = d.decompress(data) + d.flush()
+    return json.loads(raw.decode('utf-8'))
+
+
+class SnapshotWriter(object):
+    """ Stream expanded CDN configs to a snapshot file. """
+
+    def __init__(self, path, level=6):
+        self.path = path
+        self.level = level
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+        self._blobs = []
+        self._blob_ids = {}
+        self._cdns = []
+        self._zdict = None
+        self._zdict_pos = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._cdns)
+
+    def _write_record(self, obj, zdict=None):
+        data = _pack(obj, self.level, zdict)
+        pos = (self._offset, len(data))
+        self._file.write(data)
+        self._offset += len(data)
+        return pos
+
+    def _blob(self, item):
+        h = content_hash(item)
+        idx = self._blob_ids.get(h)
+        if idx is None:
+            idx = self._blob_ids[h] = len(self._blobs)
+            self._blobs.append(self._write_record(item))
+        return idx
+
+    def write(self, cdn_config):
+        """ Append an expanded CDN config. """
+        record = {'base': dict((k, v) for k, v in cdn_config.items()
+                               if k not in SUB_RESOURCES)}
+
+        with self._lock:
+            for kind in SUB_RESOURCES:
+                items = cdn_config.get(kind)
+                if not isinstance(items, list):
+                    if kind in cdn_config:
+                        record['base'][kind] = items
+                    continue
+                refs = []
+                for item in items:
+                    ident = dict((k, item[k]) for k in IDENTITY_FIELDS
+                                 if k in item)
+                    content = dict((k, v) for k, v in item.items()
+                                   if k not in IDENTITY_FIELDS)
+                    refs.append([ident, self._blob(content)])
+                record[kind] = refs
+
+            if self._zdict is None:
+                offset, size = self._write_record(record)
+                self._zdict = _dumps(record)
+                self._zdict_pos = [offset, size]
+            else:
+                offset, size = self._write_record(record, self._zdict)
+            self._cdns.append([cdn_config.get('id'), cdn_config.get('name'),
+                               offset, size])
+
+    def close(self):
+        """ Write the index and close the file. """
+        if self._file.closed:
+            return
+        index = _pack({'cdns': self._cdns, 'blobs': self._blobs,
+                       'zdict': self._zdict_pos}, self.level)
+        self._file.write(index)
+        self._file.write(TRAILER.pack(self._offset, len(index)))
+        self._file.close()
+
+
+class SnapshotReader(object):
+    """
+        Read a snapshot file. CDNs are decoded on demand, by id, by name or
+        iterating, in the order they were written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._lock = threading.Lock()
+        self._blob_cache = {}
+
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError('{} is not a snapshot file'.format(path))
+
+        self._file.seek(-TRAILER.size, 2)
+        offset, size = TRAILER.unpack(self._file.read(TRAILER.size))
+        index = _unpack(self._read(offset, size))
+
+        self._blobs = index['blobs']
+        self._cdns = index['cdns']
+        self._by_id = dict((c[0], c) for c in self._cdns)
+        self._by_name = dict((c[1], c) for c in self._cdns)
+
+        self._zdict_pos = index.get('zdict')
+        self._zdict = None
+        if self._zdict_pos:
+            self._zdict = zlib.decompress(self._read(*self._zdict_pos))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._cdns)
+
+    def __iter__(self):
+        for c in self._cdns:
+            yield self._load(c)
+
+    def _read(self, offset, size):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _blob(self, idx):
+        blob = self._blob_cache.get(idx)
+        if blob is None:
+            blob = self._blob_cache[idx] = _unpack(self._read(*self._blobs[idx]))
+        return blob
+
+    def _load(self, entry):
+        data = self._read(entry[2], entry[3])
+        if [entry[2], entry[3]] == self._zdict_pos:
+            record = _unpack(data)
+        else:
+            record = _unpack(data, self._zdict)
+        cdn_config = record['base']
+        for kind in SUB_RESOURCES:
+            if kind not in record:
+                continue
+            items = []
+            for ident, idx in record[kind]:
+                # cached blobs are shared by CDNs, never hand them out
+                item = copy.deepcopy(self._blob(idx))
+                item.update(ident)
+                items.append(item)
+            cdn_config[kind] = items
+        return cdn_config
+
+    def ids(self):
+        return [c[0] for c in self._cdns]
+
+    def names(self):
+        return [c[1] for c in self._cdns]
+
+    def get(self, cdn_id=None, cdn_name=None):
+        """ Return the expanded CDN config by id or name, or None. """
+        if cdn_id is not None:
+            entry = self._by_id.get(cdn_id)
+        else:
+            entry = self._by_name.get(cdn_name)
+        return self._load(entry) if entry is not None else None
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import deque
+
+
+class LatencyWindow(object):
+    """ Keep the most recent samples and compute percentiles over them. """
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, value):
+        with self._lock:
+            self._samples.append(value)
+
+    def percentile(self, pct):
+        """
+            Return the pct percentile (0-100) of the samples, or None when
+            there are no samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        idx = int(round((pct / 100.0) * (len(samples) - 1)))
+        return samples[min(max(idx, 0), len(samples) - 1)]
+
+
+class RequestStats(object):
+    """ Counters of the requests sent by an APIService. """
+
+    def __init__(self, window=200):
+        self.requests = 0
+        self.hedges = 0
+        self.errors = 0
+        self.wait = 0.0
+        self.latency = LatencyWindow(window)
+        self.get_latency = LatencyWindow(window)
+        self._lock = threading.Lock()
+
+    def record_request(self, method, elapsed, error=False):
+        with self._lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+        if not error:
+            self.latency.add(elapsed)
+            if method == 'GET':
+                self.get_latency.add(elapsed)
+
+    def record_hedge(self):
+        with self._lock:
+            self.hedges += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait += seconds
+
+    def summary(self):
+        """ Return the counters and latency percentiles as a dict. """
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'errors': self.errors,
+            'wait': self.wait,
+            'latency_p50': self.latency.percentile(50),
+            'latency_p95': self.latency.percentile(95),
+            'latency_p99': self.latency.percentile(99),
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from collections import namedtuple
+
+from .inventory import origin_id
+
+SUB_RESOURCES = ('origins', 'cache_settings', 'rules_engine')
+
+
+class SyncEvent(namedtuple('SyncEvent',
+                           'action kind cdn_id resource_id data')):
+    """
+        Change found by a sync. action is added, changed or removed; kind is
+        cdn or a sub-resource (origins, cache_settings, rules_engine); data
+        is the new content, None when removed.
+    """
+    __slots__ = ()
+
+
+def content_hash(obj):
+    """ Return a stable hash of a JSON serializable object. """
+    import hashlib
+
+    raw = json.dumps(obj, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def resource_id(kind, item):
+    """ Return the ID of a sub-resource item. """
+    if kind == 'origins':
+        rid = origin_id(item)
+    else:
+        rid = item.get('id')
+    return item.get('name') if rid is None else rid
+
+
+class SyncState(object):
+    """
+        Content hashes of the CDNs and sub-resources seen by the last sync,
+        with the time each CDN was expanded. A CDN is not complete when a
+        sub-resource could not be fetched.
+    """
+
+    def __init__(self, cdns=None):
+        # {cdn_id: {'hash': str, 'fetched_at': float, 'complete': bool,
+        #           'resources': {kind: {resource_id: hash}}}}
+        self.cdns = cdns or {}
+
+    def __len__(self):
+        return len(self.cdns)
+
+    def to_dict(self):
+        """ Return the state as JSON serializable dict, keeping ID types. """
+        cdns = []
+        for cdn_id, c in self.cdns.items():
+            resources = dict((kind, [[rid, h] for rid, h in hashes.items()])
+                             for kind, hashes in c['resources'].items())
+            cdns.append({'cdn_id': cdn_id, 'hash': c['hash'],
+                         'fetched_at': c['fetched_at'],
+                         'complete': c.get('complete', True),
+                         'resources': resources})
+        return {'cdns': cdns}
+
+    @classmethod
+    def from_dict(cls, data):
+        cdns = {}
+        for c in data.get('cdns', []):
+            resources = dict((kind, dict((rid, h) for rid, h in hashes))
+                             for kind, hashes in c['resources'].items())
+            cdns[c['cdn_id']] = {'hash': c['hash'],
+                                 'fetched_at': c['fetched_at'],
+                                 'complete': c.get('complete', True),
+                                 'resources': resources}
+        return cls(cdns)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def diff_resources(cdn_id, kind, previous, items):
+    """
+        Compare sub-resources items with the previous hashes.
+
+        :return: Tuple of new hashes and the list of SyncEvent.
+    """
+    hashes = {}
+    events = []
+    for item in items:
+        rid = resource_id(kind, item)
+        h = content_hash(item)
+        hashes[rid] = h
+        if rid not in previous:
+            events.append(SyncEvent('added', kind, cdn_id, rid, item))
+        elif previous[rid] != h:
+            events.append(SyncEvent('changed', kind, cdn_id, rid, item))
+
+    for rid in previous:
+        if rid not in hashes:
+            events.append(SyncEvent('removed', kind, cdn_id, rid, None))
+
+    return hashes, events
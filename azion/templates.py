@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+
+
+class Param(object):
+    """
+        Template value replaced by a parameter, converted with type. Use it
+        for non string values, eg. TTLs; strings use {name} placeholders.
+    """
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type=None):
+        self.name = name
+        self.type = type
+
+    def __repr__(self):
+        return 'Param({!r})'.format(self.name)
+
+
+def _copy(value):
+    """ Copy the dicts and lists (tuples become lists) of a JSON like value. """
+    if isinstance(value, dict):
+        return dict((k, _copy(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_copy(v) for v in value]
+    return value
+
+
+def _compile(node):
+    """
+        Compile a template node.
+
+        :return: Tuple (constant, value): value is the node itself when
+            constant, otherwise a builder(params, share).
+    """
+    if isinstance(node, Param):
+        name, conv = node.name, node.type or (lambda v: v)
+        return False, lambda p, share: conv(p[name])
+
+    if isinstance(node, str):
+        if '{' not in node:
+            return True, node
+        return False, lambda p, share: node.format_map(p)
+
+    if isinstance(node, dict):
+        items = [(k,) + _compile(v) for k, v in node.items()]
+        if all(const for _, const, _ in items):
+            return True, node
+        parts = [(k, _constant(v) if const else v) for k, const, v in items]
+        return False, lambda p, share: {k: b(p, share) for k, b in parts}
+
+    if isinstance(node, (list, tuple)):
+        items = [_compile(v) for v in node]
+        if all(const for const, _ in items):
+            return True, list(node)
+        parts = [_constant(v) if const else v for const, v in items]
+        return False, lambda p, share: [b(p, share) for b in parts]
+
+    return True, node
+
+
+def _constant(value):
+    """ Builder of a constant sub-structure, shared unless share is False. """
+    if not isinstance(value, (dict, list)):
+        return lambda p, share: value
+    return lambda p, share: value if share else _copy(value)
+
+
+class PayloadTemplate(object):
+    """
+        Payload template compiled once and rendered for many parameters.
+        Strings may have {name} placeholders, Param() is replaced by the
+        parameter value. The template is copied when compiled. Sub-structures
+        without parameters are built once and shared by every payload
+        rendered with share=True, which must then be treated as read-only.
+    """
+
+    def __init__(self, template, defaults=None):
+        """
+            :param template: Dict or list of the payload.
+            :param dict defaults: Default parameters, string defaults may
+                reference other parameters, eg. 'origin.{cdn_name}'.
+        """
+        self.template = template
+        self.defaults = defaults or {}
+        self._static = dict((k, v) for k, v in self.defaults.items()
+                            if not (isinstance(v, str) and '{' in v))
+        self._dynamic = [(k, v) for k, v in self.defaults.items()
+                         if k not in self._static]
+        # compile a private copy, payloads never alias the caller template
+        self._const, self._build = _compile(_copy(template))
+
+    def params(self, params):
+        """ Return params completed with the defaults. """
+        merged = dict(self._static)
+        for k, v in self._dynamic:
+            if k not in params:
+                merged[k] = v.format_map(params)
+        merged.update(params)
+        return merged
+
+    def render(self, share=True, **params):
+        """ Return the payload of params. """
+        if self._const:
+            return self._build if share else _copy(self._build)
+        return self._build(self.params(params), share)
+
+    def stream(self, rows, share=True):
+        """ Yield the payload of each dict of parameters of rows. """
+        for row in rows:
+            yield self.render(share=share, **row)
+
+
+def read_inventory(path):
+    """
+        Yield the rows of a tenants inventory as dicts of parameters. The
+        file is read lazily, CSV with a header line or JSON lines (.jsonl,
+        .ndjson, .json).
+    """
+    if path.endswith(('.jsonl', '.ndjson', '.json')):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path) as f:
+            for row in csv.DictReader(f):
+                yield dict((k, v) for k, v in row.items() if v != '')
+
+
+def generate_payloads(inventory, template=None, share=False):
+    """
+        Yield the CDN payloads of a tenants inventory, one per row, ready
+        for AzionAPI.create_cdns(). Rows need the cdn_name parameter.
+
+        :param inventory: Path of the inventory file, or an iterable of
+            dicts of parameters.
+        :param PayloadTemplate template: CDN payload template, the sample
+            CDN with origins, cache settings and rules by default.
+        :param bool share: Share the constant sub-structures between the
+            payloads, faster but the payloads must not be modified.
+        :return: Generator of payload dicts.
+    """
+    if template is None:
+        from .sample import CDN_PAYLOAD_TEMPLATE as template
+    if isinstance(inventory, str):
+        inventory = read_inventory(inventory)
+    return template.stream(inventory, share=share)
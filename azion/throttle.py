@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter(object):
+    """
+        Sliding window rate limiter: allow at most `limit` requests in any
+        `period` seconds. Thread safe, can be shared by many clients.
+    """
+
+    def __init__(self, limit, period=60.0):
+        """
+            :param int limit: Max requests allowed in a period.
+            :param float period: Window size in seconds.
+        """
+        self.limit = limit
+        self.period = period
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._sent and self._sent[0] <= now - self.period:
+            self._sent.popleft()
+
+    def wait_time(self):
+        """ Return the seconds to wait until a request is allowed. """
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            if len(self._sent) < self.limit:
+                return 0.0
+            return self._sent[0] + self.period - now
+
+    def try_acquire(self):
+        """
+            Take a slot of the budget if one is available now.
+
+            :return: True when the request is allowed.
+            :rtype : Boolean
+        """
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            if len(self._sent) < self.limit:
+                self._sent.append(now)
+                return True
+            return False
+
+    def acquire(self):
+        """
+            Block until a slot of the budget is available and take it.
+
+            :return: Seconds waited.
+            :rtype : Float
+        """
+        start = time.time()
+        while not self.try_acquire():
+            time.sleep(max(self.wait_time(), 0.01))
+        return time.time() - start
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+
+class Transport(ABC):
+    """
+        Interface of the HTTP layer used by APIService. A transport sends
+        one request and returns a response object with `status_code`,
+        `text`, `headers` and `json()`. Extra keyword arguments given to
+        APIService.request() (verify, allow_redirects, ...) are passed
+        through to request(); a transport that can not honour one raises
+        ValueError instead of ignoring it.
+    """
+
+    @abstractmethod
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+        Default transport, a pooled requests.Session. requests is imported
+        when the first request is sent.
+    """
+
+    def __init__(self, session=None):
+        self._session = session
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    self._session = requests.Session()
+        return self._session
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        return self.session.request(method=method, url=url, headers=headers,
+                                    params=params, data=data, json=json,
+                                    timeout=timeout, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+# requests options httpx only takes when the client is created
+CLIENT_OPTIONS = {
+    'verify': 'HTTP2Transport(verify=...)',
+    'cert': 'HTTP2Transport(cert=...)',
+    'proxies': 'HTTP2Transport(proxy=...)',
+    'stream': None,
+}
+
+
+class HTTP2Transport(Transport):
+    """
+        HTTP/2 transport, multiplex concurrent requests over few connections.
+        Requires the optional dependency: pip install azion[http2]
+    """
+
+    def __init__(self, max_connections=4, client=None, **client_kwargs):
+        """
+            :param int max_connections: Connections of the pool.
+            :param client: httpx.Client to use instead of a new one.
+            :param client_kwargs: Options of the new httpx.Client, eg.
+                verify, cert or proxy.
+        """
+        if client is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError("HTTP2Transport requires httpx[http2]: "
+                                  "pip install azion[http2]")
+            limits = httpx.Limits(max_connections=max_connections)
+            client = httpx.Client(http2=True, limits=limits, **client_kwargs)
+        self.client = client
+
+    def _timeout(self, timeout):
+        if isinstance(timeout, (tuple, list)):
+            import httpx
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return timeout
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        for name, where in CLIENT_OPTIONS.items():
+            if name in kwargs:
+                if where is None:
+                    raise ValueError('{} is not supported by '
+                                     'HTTP2Transport'.format(name))
+                raise ValueError('{} can not be set per request on '
+                                 'HTTP2Transport, set it on the client: '
+                                 '{}'.format(name, where))
+
+        # requests spelling of the redirect flag
+        if 'allow_redirects' in kwargs:
+            kwargs['follow_redirects'] = kwargs.pop('allow_redirects')
+        if isinstance(data, (bytes, str)):
+            kwargs['content'] = data
+        elif data is not None:
+            kwargs['data'] = data
+        if json is not None:
+            kwargs['json'] = json
+        return self.client.request(method, url, headers=dict(headers or {}),
+                                   params=params,
+                                   timeout=self._timeout(timeout), **kwargs)
+
+    def close(self):
+        self.client.close()
+
+
+class MemoryResponse(object):
+    """ Response returned by MemoryTransport. """
+
+    def __init__(self, status_code=200, body=None, headers=None, elapsed=0.0):
+        self.status_code = status_code
+        if body is None or isinstance(body, str):
+            self.text = body or ''
+        else:
+            self.text = json.dumps(body)
+        self.headers = headers or {'Content-Type': 'application/json'}
+        self.elapsed = elapsed
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class MemoryTransport(Transport):
+    """
+        In-memory transport for tests and benchmarks. Responses are
+        registered per method and path, requests are kept in `calls`.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+            :param float latency: Seconds to sleep on every request.
+        """
+        self.latency = latency
+        self.routes = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, method, path, body=None, status_code=200):
+        """
+            Register the response of method and path. body can be a
+            callable(method, path, params, data, json) returning a
+            MemoryResponse, a (status_code, body) tuple or the body.
+        """
+        self.routes[(method.upper(), '/' + path.strip('/'))] = (status_code,
+                                                                 body)
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        path = '/' + urlparse(url).path.strip('/')
+        with self._lock:
+            self.calls.append((method, path, params, data, json))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        route = self.routes.get((method.upper(), path))
+        if route is None:
+            return MemoryResponse(404, {'detail': 'Not found.'})
+
+        status_code, body = route
+        if callable(body):
+            body = body(method, path, params, data, json)
+            if isinstance(body, MemoryResponse):
+                return body
+            if isinstance(body, tuple):
+                status_code, body = body
+        return MemoryResponse(status_code, body)
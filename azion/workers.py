@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+def run_bounded(fn, items, concurrency=1, ordered=False, window=None):
+    """
+        Yield fn(item) of every item, running up to concurrency calls on
+        worker threads. items is consumed lazily and at most window calls
+        (2 * concurrency by default) are queued or running. When the caller
+        stops iterating, the calls not started yet are cancelled.
+
+        :param callable fn: Function of one item.
+        :param items: Iterable of items.
+        :param int concurrency: Calls running at the same time, fn runs in
+            the calling thread when 1.
+        :param bool ordered: Yield in items order instead of completion
+            order.
+        :param int window: Max calls queued or running.
+        :return: Generator of fn results.
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    window = window or 2 * concurrency
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending = []
+
+    def pop():
+        if ordered:
+            f = pending[0]
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            f = next(f for f in pending if f in done)
+        pending.remove(f)
+        return f.result()
+
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pop()
+        while pending:
+            yield pop()
+    finally:
+        for f in pending:
+            f.cancel()
+        pool.shutdown(wait=False)
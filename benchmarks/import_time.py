@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2017 MTOps All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Measure the time to import azion and create a client in a fresh
+# interpreter, and fail when it is over the budget:
+#
+#   python benchmarks/import_time.py --budget 40
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+BASELINE = 'pass'
+STATEMENT = "from azion import AzionAPI; AzionAPI(token='x')"
+
+
+def run(statement, runs):
+    """ Return the median wall time, in ms, of running statement. """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', statement], env=env)
+        times.append((time.time() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def heavy_modules():
+    """ Return the heavy modules loaded by the statement, should be none. """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    check = ("import sys; {}; print(' '.join(m for m in ('requests', "
+             "'concurrent.futures', 'azion.sample', 'ast', 'gzip', 'hashlib') "
+             "if m in sys.modules))".format(STATEMENT))
+    out = subprocess.check_output([sys.executable, '-c', check], env=env)
+    return out.decode('utf-8').split()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=40.0,
+                        help='Max ms over the interpreter startup.')
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    baseline = run(BASELINE, args.runs)
+    total = run(STATEMENT, args.runs)
+    cost = total - baseline
+    heavy = heavy_modules()
+
+    print('interpreter: {:.1f}ms, with azion: {:.1f}ms, '
+          'import cost: {:.1f}ms (budget {:.1f}ms)'.format(
+              baseline, total, cost, args.budget))
+    if heavy:
+        print('heavy modules loaded at import: {}'.format(', '.join(heavy)))
+
+    return 0 if cost <= args.budget and not heavy else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,7 +25,16 @@ setup(
     author_email='braga@mtulio.eng.br',
     license='Apache-2.0',
     keywords=['AZOIN', 'SDK', 'CDN'],
+    python_requires='>=3.7',
     install_requires=[
         'requests',
-    ]
+    ],
+    extras_require={
+        'http2': ['httpx[http2]'],
+    },
+    entry_points={
+        'console_scripts': [
+            'azion=azion.cli:main',
+        ],
+    }
 )
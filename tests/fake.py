@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+
+from azion.transport import MemoryTransport, MemoryResponse
+
+CDNS = '/content_delivery/configurations'
+SUB_RESOURCES = ('origins', 'cache_settings', 'rules_engine')
+
+
+class FakeAzion(MemoryTransport):
+    """
+        Stateful fake of the CDN configurations API: CDNs and their
+        sub-resources are kept in memory and created with new IDs.
+    """
+
+    def __init__(self, latency=0.0):
+        MemoryTransport.__init__(self, latency)
+        self.ids = itertools.count(100)
+        self.cdns = {}
+        self.subs = {}
+
+    def add_cdn(self, name, **subs):
+        """ Store a CDN with its sub-resources lists, return its ID. """
+        cdn = {'id': next(self.ids), 'name': name}
+        self.cdns[cdn['id']] = cdn
+        for kind in SUB_RESOURCES:
+            self.subs[(cdn['id'], kind)] = list(subs.get(kind, []))
+        return cdn['id']
+
+    def request(self, method, url, headers=None, params=None, data=None,
+                json=None, timeout=None, **kwargs):
+        response = MemoryTransport.request(self, method, url)
+        if response.status_code != 404:
+            return response
+
+        path = self.calls[-1][1]
+        with self._lock:
+            self.calls[-1] = (method, path, params, data, json)
+            return self._handle(method, path, json)
+
+    def _handle(self, method, path, body):
+        if not path.startswith(CDNS):
+            return MemoryResponse(404, {'detail': 'Not found.'})
+        parts = [p for p in path[len(CDNS):].split('/') if p]
+
+        if not parts:
+            if method == 'GET':
+                return MemoryResponse(200, list(self.cdns.values()))
+            cdn = dict(body, id=next(self.ids))
+            self.cdns[cdn['id']] = cdn
+            for kind in SUB_RESOURCES:
+                self.subs[(cdn['id'], kind)] = []
+            return MemoryResponse(201, cdn)
+
+        cdn_id = int(parts[0])
+        if cdn_id not in self.cdns:
+            return MemoryResponse(404, {'detail': 'Not found.'})
+
+        if len(parts) == 1:
+            if method == 'DELETE':
+                del self.cdns[cdn_id]
+                return MemoryResponse(204)
+            return MemoryResponse(200, self.cdns[cdn_id])
+
+        kind = parts[1]
+        if method == 'GET':
+            return MemoryResponse(200, self.subs[(cdn_id, kind)])
+        item = dict(body)
+        item['origin_id' if kind == 'origins' else 'id'] = next(self.ids)
+        self.subs[(cdn_id, kind)].append(item)
+        return MemoryResponse(201, item)
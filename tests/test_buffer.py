@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.service_api import APIService
+from azion.transport import MemoryTransport
+
+
+def _echo(method, path, params, data, json):
+    return 200, {'method': method, 'path': path, 'payload': data}
+
+
+class WriteBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        for path in ('/a', '/b', '/c'):
+            self.transport.add('PATCH', path, _echo)
+            self.transport.add('PUT', path, _echo)
+        self.api = APIService('http://api', transport=self.transport)
+
+    def test_patches_are_merged_last_writer_wins(self):
+        self.api.enable_write_buffer(max_delay=None)
+        f1 = self.api.update('/a', {'weight': 1, 'active': True})
+        f2 = self.api.update('/a', {'weight': 2})
+
+        self.assertEqual(self.api.flush(), 1)
+        self.assertEqual(len(self.transport.calls), 1)
+        expected = {'method': 'PATCH', 'path': '/a',
+                    'payload': {'weight': 2, 'active': True}}
+        self.assertEqual(f1.result(), expected)
+        self.assertEqual(f2.result(), expected)
+
+    def test_put_replaces_and_patch_merges_into_put(self):
+        self.api.enable_write_buffer(max_delay=None)
+        self.api.update('/a', {'weight': 1, 'host': 'x'})
+        self.api.override('/a', {'weight': 5})
+        f = self.api.update('/a', {'active': False})
+        self.api.flush()
+
+        self.assertEqual(f.result(), {'method': 'PUT', 'path': '/a',
+                                      'payload': {'weight': 5,
+                                                  'active': False}})
+
+    def test_one_request_per_path(self):
+        self.api.enable_write_buffer(max_delay=None)
+        self.api.update('/a', {'x': 1})
+        self.api.update('/b', {'x': 1})
+        self.api.update('/a', {'y': 1})
+
+        self.assertEqual(self.api.flush(), 2)
+        self.assertEqual([c[1] for c in self.transport.calls], ['/a', '/b'])
+
+    def test_flush_on_size(self):
+        self.api.enable_write_buffer(max_delay=None, max_size=2)
+        f = self.api.update('/a', {'x': 1})
+        self.assertFalse(f.done())
+
+        self.api.update('/b', {'x': 1})
+        self.assertTrue(f.done())
+        self.assertEqual(len(self.api.write_buffer), 0)
+
+    def test_flush_on_delay(self):
+        self.api.enable_write_buffer(max_delay=0.05)
+        f = self.api.update('/a', {'x': 1})
+        self.assertEqual(f.result(timeout=2)['payload'], {'x': 1})
+
+    def test_error_is_set_on_futures(self):
+        def fail(method, path, payload, timeout):
+            raise IOError('down')
+
+        buf = self.api.enable_write_buffer(max_delay=None)
+        buf.send = fail
+        f = self.api.update('/a', {'x': 1})
+        self.api.flush()
+        self.assertRaises(IOError, f.result)
+
+    def test_merged_write_keeps_last_timeout(self):
+        timeouts = []
+        send = self.api._write
+
+        def record(method, path, payload, timeout):
+            timeouts.append(timeout)
+            return send(method, path, payload, timeout)
+
+        buf = self.api.enable_write_buffer(max_delay=None)
+        buf.send = record
+        self.api.update('/a', {'x': 1}, timeout=5)
+        self.api.update('/a', {'y': 1})
+        self.api.update('/b', {'y': 1})
+        self.api.flush()
+
+        self.assertEqual(timeouts, [5, None])
+
+    def test_disabled_buffer_sends_immediately(self):
+        resp = self.api.update('/c', {'x': 1})
+        self.assertEqual(resp['payload'], {'x': 1})
+
+        self.api.enable_write_buffer(max_delay=None)
+        f = self.api.update('/c', {'x': 2})
+        self.api.disable_write_buffer()
+        self.assertTrue(f.done())
+        self.assertIsNone(self.api.write_buffer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from azion.cassette import CassetteMiss, RecordingTransport
+from azion.service_api import APIService
+from azion.transport import MemoryTransport
+
+
+class Counter(object):
+    """ Route answering the number of calls, after latency seconds. """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.count = 0
+
+    def __call__(self, method, path, params, data, json):
+        time.sleep(self.latency)
+        self.count += 1
+        return 200, {'n': self.count, 'params': params}
+
+
+class CassetteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'api.cassette')
+        self.transport = MemoryTransport()
+        self.route = Counter(latency=0.05)
+        self.transport.add('GET', '/x', self.route)
+        self.transport.add('POST', '/x', self.route)
+        self.api = APIService('http://api', transport=self.transport)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _record(self):
+        self.api.record(self.path)
+        self.api.get('/x')
+        self.api.get('/x')
+        self.api.create('/x', payload_json={'name': 'a'})
+        self.api.eject()
+
+    def test_round_trip(self):
+        self._record()
+        self.assertIs(self.api.transport, self.transport)
+        self.assertEqual(self.route.count, 3)
+
+        self.api.replay(self.path)
+        # identical requests are answered in recording order
+        self.assertEqual(self.api.get('/x')['n'], 1)
+        self.assertEqual(self.api.get('/x')['n'], 2)
+        # the last answer is kept for further repeats
+        self.assertEqual(self.api.get('/x')['n'], 2)
+        self.assertEqual(
+            self.api.create('/x', payload_json={'name': 'a'})['n'], 3)
+        self.api.eject()
+
+        self.assertEqual(self.route.count, 3)
+        self.assertIs(self.api.transport, self.transport)
+
+    def test_miss(self):
+        self._record()
+        self.api.replay(self.path)
+
+        self.assertRaises(CassetteMiss, self.api.get, '/y')
+        self.assertRaises(CassetteMiss, self.api.create, '/x',
+                          payload_json={'name': 'b'})
+
+    def test_fast_and_realtime_replay(self):
+        self._record()
+
+        self.api.replay(self.path)
+        start = time.time()
+        self.api.get('/x')
+        self.assertLess(time.time() - start, 0.04)
+        self.api.eject()
+
+        self.api.replay(self.path, realtime=True)
+        start = time.time()
+        self.api.get('/x')
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+    def test_transport_options_pass_through(self):
+        seen = []
+
+        class Inner(MemoryTransport):
+            def request(self, method, url, **kwargs):
+                seen.append(kwargs.pop('verify', None))
+                kwargs.pop('allow_redirects', None)
+                return MemoryTransport.request(self, method, url, **kwargs)
+
+        inner = Inner()
+        inner.add('GET', '/x', {'ok': True})
+        self.api.transport = inner
+
+        recorder = self.api.record(self.path)
+        self.assertIsInstance(recorder, RecordingTransport)
+        self.api.request('GET', '/x', verify=False, allow_redirects=False)
+        self.api.eject()
+        self.assertEqual(seen, [False])
+
+        self.api.replay(self.path)
+        response = self.api.request('GET', '/x', verify=False,
+                                    allow_redirects=False)
+        self.assertEqual(response.json(), {'ok': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
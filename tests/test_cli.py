@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import unittest
+from unittest import mock
+
+from azion import cli
+from azion.service_azion import AzionAPI
+
+from .fake import FakeAzion, CDNS
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        self.www = self.transport.add_cdn(
+            'www', origins=[{'origin_id': 1, 'name': 'o',
+                             'addresses': [{'address': '10.0.0.1'}]}],
+            rules_engine=[{'id': 2, 'path': '/'}])
+        self.transport.add_cdn('static')
+        self.api = AzionAPI(token='t', transport=self.transport,
+                            rate_limit=None)
+        self.out = io.StringIO()
+        self.err = io.StringIO()
+
+    def _main(self, *argv):
+        return cli.main(list(argv), api=self.api, out=self.out, err=self.err)
+
+    def _lines(self):
+        return [json.loads(l) for l in self.out.getvalue().splitlines()]
+
+    def test_export_ndjson(self):
+        self.assertEqual(self._main('--concurrency', '2', 'export'), 0)
+
+        cdns = sorted(self._lines(), key=lambda c: c['name'])
+        self.assertEqual([c['name'] for c in cdns], ['static', 'www'])
+        self.assertEqual(cdns[1]['rules_engine'], [{'id': 2, 'path': '/'}])
+
+    def test_export_fields(self):
+        self._main('export', '--fields', 'origins.addresses')
+
+        cdn = [c for c in self._lines() if c['name'] == 'www'][0]
+        self.assertEqual(cdn['origins'],
+                         [{'addresses': [{'address': '10.0.0.1'}]}])
+        self.assertNotIn(CDNS + '/%d/rules_engine' % self.www,
+                         [c[1] for c in self.transport.calls])
+
+    def test_stats(self):
+        self._main('--stats', 'export')
+
+        self.assertIn('requests: 7 (hedges: 0, errors: 0)',
+                      self.err.getvalue())
+        self.assertIn('latency p50:', self.err.getvalue())
+
+    def test_delete(self):
+        self.assertEqual(self._main('delete', '--id', str(self.www)), 0)
+
+        self.assertEqual(self._lines(), [{}])
+        self.assertNotIn(self.www, self.transport.cdns)
+        self.assertEqual(self._main('delete', '--id', '999'), 1)
+
+    def test_apply_dry_run(self):
+        self.assertEqual(self._main('--concurrency', '4', 'apply',
+                                    '--name', 'new', '--dry-run'), 0)
+
+        calls = self._lines()
+        self.assertEqual(calls[0]['method'], 'GET')
+        self.assertEqual(calls[1]['method'], 'POST')
+        self.assertIn('calls: {:d}'.format(len(calls)), self.err.getvalue())
+        # nothing was sent
+        self.assertEqual(self.transport.calls, [])
+
+    def test_apply_uses_concurrency(self):
+        with mock.patch.object(self.api, '_create_cdn_items',
+                               wraps=self.api._create_cdn_items) as items:
+            self.assertEqual(self._main('--concurrency', '3', 'apply',
+                                        '--name', 'new'), 0)
+
+        self.assertEqual(items.call_args[1]['concurrency'], 3)
+        self.assertEqual(len(self.transport.cdns), 3)
+
+    def test_rate_limit_option(self):
+        built = []
+
+        def build(**kwargs):
+            built.append(kwargs)
+            return AzionAPI(transport=self.transport, **kwargs)
+
+        with mock.patch.object(cli, 'AzionAPI', side_effect=build):
+            cli.main(['--rate-limit', '100', 'export'], out=self.out,
+                     err=self.err)
+
+        self.assertEqual(built[0]['rate_limit'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from azion.service_api import APIService
+from azion.throttle import RateLimiter
+from azion.transport import MemoryTransport
+
+
+class SlowFirst(object):
+    """ Route answering slowly to the first call after arm(). """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.armed = False
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def arm(self):
+        self.armed = True
+
+    def __call__(self, method, path, params, data, json):
+        with self.lock:
+            self.count += 1
+            n = self.count
+            slow, self.armed = self.armed, False
+        if slow:
+            time.sleep(self.delay)
+        return 200, {'n': n}
+
+
+class HedgedGetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.route = SlowFirst(0.5)
+        self.transport = MemoryTransport()
+        self.transport.add('GET', '/x', self.route)
+
+    def _api(self, **kwargs):
+        api = APIService('http://api', transport=self.transport,
+                         hedge_percentile=90, hedge_min_samples=3, **kwargs)
+        for _ in range(3):
+            api.get('/x')
+        return api
+
+    def test_hedge_answers_first(self):
+        api = self._api()
+        self.route.arm()
+
+        start = time.time()
+        resp = api.get('/x')
+
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(resp, {'n': 5})
+        self.assertEqual(api.stats.hedges, 1)
+
+    def test_no_hedge_before_min_samples(self):
+        api = APIService('http://api', transport=self.transport,
+                         hedge_percentile=90, hedge_min_samples=3)
+        self.route.arm()
+        self.assertEqual(api.get('/x'), {'n': 1})
+        self.assertEqual(api.stats.hedges, 0)
+
+    def test_hedge_counts_against_rate_budget(self):
+        limiter = RateLimiter(4, 60)
+        api = self._api(rate_limiter=limiter)
+        self.route.arm()
+
+        # the 4th request takes the last slot, no budget left to hedge
+        self.assertEqual(api.get('/x'), {'n': 4})
+        self.assertEqual(api.stats.hedges, 0)
+
+    def test_hedge_takes_a_budget_slot(self):
+        limiter = RateLimiter(5, 60)
+        api = self._api(rate_limiter=limiter)
+        self.route.arm()
+
+        api.get('/x')
+        self.assertEqual(api.stats.hedges, 1)
+        self.assertFalse(limiter.try_acquire())
+
+    def test_post_is_never_hedged(self):
+        self.transport.add('POST', '/x', self.route)
+        api = self._api()
+        self.route.arm()
+        api.create('/x', payload_json={})
+        self.assertEqual(api.stats.hedges, 0)
+
+    def test_timeout_is_passed_to_transport(self):
+        seen = []
+
+        class Recorder(MemoryTransport):
+            def request(self, method, url, timeout=None, **kwargs):
+                seen.append(timeout)
+                return MemoryTransport.request(self, method, url, **kwargs)
+
+        api = APIService('http://api', transport=Recorder(), timeout=(1, 5))
+        api.get('/x')
+        api.get('/x', timeout=2)
+        api.update('/x', {}, timeout=3)
+        api.override('/x', {})
+        self.assertEqual(seen, [(1, 5), 2, 3, (1, 5)])
+
+    def test_concurrent_callers_do_not_queue(self):
+        latency = [0.1]
+
+        def route(*args):
+            time.sleep(latency[0])
+            return 200, {}
+
+        transport = MemoryTransport()
+        transport.add('GET', '/y', route)
+        api = APIService('http://api', transport=transport,
+                         hedge_percentile=50, hedge_min_samples=3)
+        for _ in range(3):
+            api.get('/y')
+
+        # faster than the hedge delay, unless queued behind other callers
+        latency[0] = 0.03
+        threads = [threading.Thread(target=api.get, args=('/y',))
+                   for _ in range(32)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(api.stats.hedges, 0)
+        self.assertGreaterEqual(api._hedge_workers, 16)
+        self.assertEqual(api._hedge_inflight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
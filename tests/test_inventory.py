@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.inventory import Inventory
+from azion.service_azion import AzionAPI
+
+from .fake import FakeAzion
+
+
+def _cdn(cdn_id, name, cname, address, cache='default', path='/'):
+    return {
+        'id': cdn_id,
+        'name': name,
+        'cname': [cname],
+        'origins': [{'origin_id': cdn_id * 10, 'name': 'origin',
+                     'host_header': 'host.' + cname,
+                     'addresses': [{'address': address}]}],
+        'cache_settings': [{'id': cdn_id * 100, 'name': cache}],
+        'rules_engine': [{'id': cdn_id * 1000, 'path': path,
+                          'cache_settings_id': cdn_id * 100}],
+    }
+
+
+class InventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inv = Inventory([
+            _cdn(1, 'www', 'WWW.example.com', '10.0.0.1'),
+            _cdn(2, 'static', 'static.example.com', '10.0.0.1',
+                 path='/static'),
+        ])
+
+    def _index_sizes(self):
+        return dict((i, len(v)) for i, v in self.inv._indexes.items())
+
+    def _indexed(self, cdn_id):
+        """ Return the (index, key) pairs pointing to cdn_id. """
+        return set((i, k) for i, keys in self.inv._indexes.items()
+                   for k, entries in keys.items() if cdn_id in entries)
+
+    def test_lookups(self):
+        self.assertEqual(self.inv.by_name('www')['id'], 1)
+        self.assertEqual([c['id'] for c in
+                          self.inv.by_cname('www.EXAMPLE.com')], [1])
+        self.assertEqual(sorted(c['id'] for c, _ in
+                                self.inv.by_origin_address('10.0.0.1')),
+                         [1, 2])
+        self.assertEqual(self.inv.by_host_header('host.static.example.com')
+                         [0][1]['origin_id'], 20)
+        self.assertEqual(self.inv.by_rule_path('/static')[0][0]['id'], 2)
+        self.assertIsNone(self.inv.by_name('missing'))
+
+    def test_rules_by_cache_setting(self):
+        rules = self.inv.rules_by_cache_setting('default')
+
+        self.assertEqual(sorted((c['id'], r['id']) for c, r in rules),
+                         [(1, 1000), (2, 2000)])
+        self.assertEqual(self.inv.rules_by_cache_setting('other'), [])
+
+    def test_add_replaces_cdn(self):
+        self.inv.add(_cdn(1, 'www2', 'new.example.com', '10.0.0.9'))
+
+        self.assertEqual(len(self.inv), 2)
+        self.assertIsNone(self.inv.by_name('www'))
+        self.assertEqual(self.inv.by_cname('www.example.com'), [])
+        self.assertEqual([c['id'] for c, _ in
+                          self.inv.by_origin_address('10.0.0.1')], [2])
+        self.assertEqual(self.inv.by_name('www2')['id'], 1)
+        self.assertEqual(self._indexed(1), self.inv._keys[1])
+        self.assertNotIn(('cname', 'www.example.com'), self._indexed(1))
+
+    def test_remove_cleans_indexes(self):
+        self.inv.remove(1)
+        self.inv.remove(2)
+
+        self.assertEqual(len(self.inv), 0)
+        self.assertEqual(self.inv._keys, {})
+        self.assertEqual(self._index_sizes(),
+                         dict((i, 0) for i in Inventory.INDEXES))
+        self.assertIsNone(self.inv.remove(3))
+
+    def test_ignores_errors(self):
+        self.inv.add({'error': '500'})
+        cdn = _cdn(3, 'broken', 'b.example.com', '10.0.0.3')
+        cdn['origins'] = {'error': '500'}
+        self.inv.add(cdn)
+
+        self.assertEqual(len(self.inv), 3)
+        self.assertEqual(self.inv.by_origin_address('10.0.0.3'), [])
+
+
+class GetInventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        self.www = self.transport.add_cdn(
+            'www', origins=[{'origin_id': 1, 'name': 'o',
+                             'addresses': [{'address': '10.0.0.1'}]}])
+        self.transport.add_cdn('static')
+        self.api = AzionAPI(token='t', transport=self.transport,
+                            rate_limit=None)
+
+    def test_refresh_single_cdn(self):
+        inv = self.api.get_inventory()
+        self.assertEqual(len(inv), 2)
+
+        self.transport.subs[(self.www, 'origins')][0]['addresses'] = [
+            {'address': '10.0.0.2'}]
+        del self.transport.calls[:]
+        self.api.get_inventory(inv, cdn_id=self.www)
+
+        self.assertEqual(inv.by_origin_address('10.0.0.1'), [])
+        self.assertEqual(inv.by_origin_address('10.0.0.2')[0][0]['id'],
+                         self.www)
+        # only the CDN and its sub-resources are fetched again
+        self.assertEqual(len(self.transport.calls), 4)
+
+    def test_refresh_deleted_cdn(self):
+        inv = self.api.get_inventory()
+        del self.transport.cdns[self.www]
+
+        self.api.get_inventory(inv, cdn_id=self.www)
+        self.assertNotIn(self.www, inv)
+        self.assertIsNone(inv.by_name('www'))
+        self.assertEqual(len(inv), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
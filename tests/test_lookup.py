@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.lookup import LookupTable, shared_table
+from azion.service_azion import AzionAPI
+from azion.transport import MemoryTransport
+
+
+class Fetch(object):
+    """ Fetch returning the queued results, counting the calls. """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results.pop(0) if len(self.results) > 1 \
+            else self.results[0]
+
+
+class LookupTableTest(unittest.TestCase):
+
+    def test_resolve(self):
+        fetch = Fetch([{'id': 1, 'name': 'a'}])
+        table = LookupTable(fetch)
+
+        self.assertEqual(table.resolve('a'), 1)
+        self.assertEqual(table.resolve('a'), 1)
+        self.assertEqual(fetch.calls, 1)
+
+    def test_missing_name_refreshes_after_min_refresh(self):
+        fetch = Fetch([], [{'id': 2, 'name': 'b'}])
+        table = LookupTable(fetch, min_refresh=60)
+
+        self.assertIsNone(table.resolve('b'))
+        self.assertIsNone(table.resolve('b'))
+        self.assertEqual(fetch.calls, 1)
+
+        table.min_refresh = 0
+        self.assertEqual(table.resolve('b'), 2)
+
+    def test_failed_fetch_is_not_retried_at_once(self):
+        fetch = Fetch({'error': '500'})
+        table = LookupTable(fetch, min_refresh=60)
+
+        for _ in range(5):
+            self.assertIsNone(table.resolve('a'))
+        self.assertEqual(fetch.calls, 1)
+
+    def test_failed_fetch_keeps_table(self):
+        fetch = Fetch([{'id': 1, 'name': 'a'}], {'error': '500'})
+        table = LookupTable(fetch, ttl=0, min_refresh=0)
+
+        self.assertEqual(table.resolve('a'), 1)
+        self.assertEqual(table.resolve('a'), 1)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_resolve_with_fetch(self):
+        table = LookupTable()
+        self.assertEqual(table.resolve('a', Fetch([{'id': 3, 'name': 'a'}])),
+                         3)
+
+
+class SharedTableTest(unittest.TestCase):
+
+    def _api(self, url):
+        transport = MemoryTransport()
+        transport.add('GET', '/digital_certificates',
+                      {'results': [{'id': 7, 'name': 'cert'}]})
+        return AzionAPI(url_api=url, token='t', transport=transport)
+
+    def test_clients_share_the_table(self):
+        a = self._api('http://shared')
+        b = self._api('http://shared')
+
+        self.assertEqual(a.lookup_certificate('cert'), 7)
+        self.assertEqual(b.lookup_certificate('cert'), 7)
+        self.assertEqual(len(b.transport.calls), 0)
+
+    def test_refresh_uses_the_resolving_client(self):
+        a = self._api('http://refresh')
+        b = self._api('http://refresh')
+        a.lookup_certificate('cert')
+
+        table = shared_table(('http://refresh', 't', 'digital_certificates'))
+        table.ttl = 0
+        table.min_refresh = 0
+        self.assertEqual(b.lookup_certificate('cert'), 7)
+
+        self.assertEqual(len(a.transport.calls), 1)
+        self.assertEqual(len(b.transport.calls), 1)
+
+    def test_get_list(self):
+        a = self._api('http://list')
+        a.transport.add('GET', '/edge_firewall', [{'id': 1, 'name': 'fw'}])
+
+        self.assertEqual(a.get_certificates(),
+                         ([{'id': 7, 'name': 'cert'}], a.status['ok']))
+        self.assertEqual(a.get_firewalls()[0], [{'id': 1, 'name': 'fw'}])
+        self.assertEqual(a.lookup_firewall('missing'), 0)
+
+    def test_get_list_follows_pages(self):
+        a = self._api('http://pages')
+
+        def pages(method, path, params, data, json):
+            if params.get('page') == '2':
+                return {'results': [{'id': 2, 'name': 'b'}],
+                        'links': {'next': None}}
+            return {'results': [{'id': 1, 'name': 'a'}],
+                    'links': {'next': 'http://pages/edge_firewall'
+                                      '?page=2&page_size=100'}}
+
+        a.transport.add('GET', '/edge_firewall', pages)
+
+        self.assertEqual(a.get_firewalls(),
+                         ([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}],
+                          a.status['ok']))
+        self.assertEqual([c[2] for c in a.transport.calls],
+                         [{'page_size': 100},
+                          {'page': '2', 'page_size': '100'}])
+        self.assertEqual(a.lookup_firewall('b'), 2)
+
+    def test_get_list_stops_on_repeated_page(self):
+        a = self._api('http://loop')
+        a.transport.add('GET', '/edge_firewall', {
+            'results': [{'id': 1, 'name': 'a'}],
+            'links': {'next': 'http://loop/edge_firewall?page_size=100'}})
+
+        self.assertEqual(a.get_firewalls()[1], a.status['ok'])
+        self.assertEqual(len(a.transport.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.service_api import ServiceInvalidArgument
+from azion.service_azion import AzionAPI
+from azion.transport import MemoryTransport
+
+
+class PlanGetCdnConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.api = AzionAPI(token='t', transport=self.transport)
+
+    def test_export_requires_cdn_count(self):
+        self.assertRaises(ServiceInvalidArgument,
+                          self.api.plan_get_cdn_config)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_export_plan_is_offline(self):
+        plan = self.api.plan_get_cdn_config(cdn_count=3)
+
+        self.assertEqual(self.transport.calls, [])
+        self.assertEqual(plan.count('GET'), 1 + 3 * 3)
+
+    def test_get_cdn_config_dry_run(self):
+        plan, status = self.api.get_cdn_config(dry_run=True, cdn_count=2)
+
+        self.assertEqual(status, self.api.status['ok'])
+        self.assertEqual(len(plan), 1 + 2 * 3)
+        self.assertEqual(self.transport.calls, [])
+
+    def test_lookup_plan(self):
+        plan = self.api.plan_get_cdn_config(option='origin', cdn_id=10)
+
+        self.assertEqual([c.path for c in plan], [
+            '/content_delivery/configurations/10',
+            '/content_delivery/configurations/10/origins'])
+
+
+
+class PlanCreateCdnTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.api = AzionAPI(token='t', transport=self.transport)
+
+    def test_plan_lists_named_resources(self):
+        payload = {
+            'digital_certificate_name': 'cert',
+            'origins': [],
+            'cache_settings': [],
+            'rules_engine': [
+                {'path': '/a'},
+                {'path': '/b', 'firewall_name': 'fw'},
+                {'path': '/c', 'firewall_name': 'fw'},
+            ],
+        }
+        plan = self.api.plan_create_cdn('cdn', payload)
+        calls = [(c.method, c.path) for c in plan]
+
+        self.assertEqual(self.transport.calls, [])
+        self.assertEqual(calls.count(('GET', '/digital_certificates')), 1)
+        self.assertEqual(calls.count(('GET', '/edge_firewall')), 1)
+        self.assertLess(calls.index(('GET', '/digital_certificates')),
+                        calls.index(('POST',
+                                     '/content_delivery/configurations')))
+        self.assertEqual(calls[4], ('GET', '/edge_firewall'))
+
+    def test_plan_without_names(self):
+        plan = self.api.plan_create_cdn('cdn', {'rules_engine': [{}]})
+
+        self.assertNotIn('/digital_certificates', [c.path for c in plan])
+        self.assertNotIn('/edge_firewall', [c.path for c in plan])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from azion.pool import AccountPool, _run_account
+from azion.transport import MemoryTransport
+
+from .fake import FakeAzion
+
+CDNS = '/content_delivery/configurations'
+
+
+class AccountPoolTest(unittest.TestCase):
+
+    def _pool(self, **kwargs):
+        pool = AccountPool(**kwargs)
+        for account in ('a', 'b', 'c'):
+            transport = MemoryTransport()
+            transport.add('GET', CDNS, [{'id': 1, 'name': account}])
+            for sub in ('origins', 'cache_settings', 'rules_engine'):
+                transport.add('GET', '%s/1/%s' % (CDNS, sub), [])
+            pool.add(account, 't-' + account, transport=transport)
+        return pool
+
+    def test_iter_cdn_config(self):
+        pool = self._pool()
+        cdns = sorted(pool.iter_cdn_config())
+
+        self.assertEqual([(a, c['name']) for a, c in cdns],
+                         [('a', 'a'), ('b', 'b'), ('c', 'c')])
+
+    def test_iter_cdn_config_reports_failed_account(self):
+        pool = self._pool()
+
+        def broken(*args, **kwargs):
+            raise RuntimeError('connection reset')
+
+        pool['b'].transport.request = broken
+        results = dict(pool.iter_cdn_config())
+
+        self.assertEqual(results['a']['name'], 'a')
+        self.assertIn('connection reset', results['b']['error'])
+
+    def test_imap_cancels_pending_accounts(self):
+        pool = self._pool(max_workers=1)
+        started = []
+        release = threading.Event()
+
+        def operation(api):
+            started.append(api)
+            if len(started) > 1:
+                release.wait(5)
+            return api
+
+        results = pool.imap(operation)
+        next(results)
+        results.close()
+        release.set()
+        time.sleep(0.1)
+
+        # the queued accounts never start
+        self.assertLess(len(started), 3)
+
+    def test_iter_cdn_config_streams_across_accounts(self):
+        pool = AccountPool()
+        slow = FakeAzion(latency=0.05)
+        fast = FakeAzion()
+        for i in range(5):
+            slow.add_cdn('slow-%d' % i)
+            fast.add_cdn('fast-%d' % i)
+        pool.add('slow', 't1', transport=slow, rate_limit=None)
+        pool.add('fast', 't2', transport=fast, rate_limit=None)
+
+        start = time.time()
+        results = pool.iter_cdn_config()
+        account, cdn = next(results)
+
+        # yielded before the slow account (1 + 3 * 5 requests) finished
+        self.assertEqual(account, 'fast')
+        self.assertLess(time.time() - start, 0.5)
+        rest = list(results)
+        self.assertEqual(len(rest), 9)
+
+    def test_iter_cdn_config_close_stops_accounts(self):
+        pool = AccountPool()
+        transport = FakeAzion(latency=0.01)
+        for i in range(20):
+            transport.add_cdn('cdn-%d' % i)
+        pool.add('a', 't', transport=transport, rate_limit=None)
+
+        results = pool.iter_cdn_config()
+        next(results)
+        results.close()
+        time.sleep(0.1)
+        calls = len(transport.calls)
+        time.sleep(0.1)
+
+        self.assertEqual(len(transport.calls), calls)
+        self.assertLess(calls, 1 + 3 * 20)
+
+    def test_process_worker_gets_client_kwargs(self):
+        pool = AccountPool()
+        transport = MemoryTransport()
+        transport.add('GET', CDNS, [])
+        pool.add('a', 't', transport=transport, timeout=7)
+
+        result = _run_account('a', None, 't', pool.client_kwargs['a'],
+                              'get', (CDNS,), {})
+
+        # the worker client sent through the account transport
+        self.assertEqual(result, ('a', []))
+        self.assertEqual(len(transport.calls), 1)
+
+        pool.remove('a')
+        self.assertNotIn('a', pool.client_kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
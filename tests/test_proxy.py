@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from azion.proxy import ProxyServer, ResponseCache
+from azion.service_api import APIService
+from azion.service_azion import AzionAPI
+from azion.throttle import RateLimiter
+from azion.transport import MemoryTransport
+
+CDNS = '/content_delivery/configurations'
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def _cache(self, *paths):
+        cache = ResponseCache(ttl=60)
+        for p in paths:
+            cache.set((p, 'token', None), p)
+        return cache
+
+    def test_expired(self):
+        cache = ResponseCache(ttl=-1)
+        cache.set(('/a', None, None), 'x')
+        self.assertIsNone(cache.get(('/a', None, None)))
+        self.assertEqual(cache.misses, 1)
+
+    def test_invalidate_related_paths(self):
+        cache = self._cache('/a', '/a/1', '/a/1/origins', '/a/1/origins/2',
+                            '/a/12', '/a/12/origins', '/a/1?page=2', '/b')
+        cache.invalidate('/a/1/origins')
+
+        self.assertEqual(sorted(k[0] for k in cache._entries),
+                         ['/a/12', '/a/12/origins', '/b'])
+
+
+class ProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.upstream = MemoryTransport()
+        self.upstream.add('GET', CDNS, [{'id': 1, 'name': 'www'}])
+        self.upstream.add('GET', CDNS + '/1', {'id': 1, 'name': 'www'})
+        self.upstream.add('GET', CDNS + '/12', {'id': 12, 'name': 'api'})
+        self.upstream.add('PATCH', CDNS + '/1', {'id': 1, 'name': 'new'})
+
+        service = APIService('http://upstream', transport=self.upstream)
+        self.server = ProxyServer(('127.0.0.1', 0), service=service)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _upstream_gets(self, path):
+        return len([c for c in self.upstream.calls
+                    if c[0] == 'GET' and c[1] == path])
+
+    def test_hit_and_miss(self):
+        api = AzionAPI(url_api=self.url, token='t')
+
+        response = api.request('GET', CDNS)
+        self.assertEqual(response.headers['X-Cache'], 'MISS')
+        response = api.request('GET', CDNS)
+        self.assertEqual(response.headers['X-Cache'], 'HIT')
+        self.assertEqual(response.json(), [{'id': 1, 'name': 'www'}])
+
+        self.assertEqual(self._upstream_gets(CDNS), 1)
+        self.assertEqual(self.server.cache.hits, 1)
+
+    def test_tokens_are_cached_apart(self):
+        AzionAPI(url_api=self.url, token='a').get(CDNS)
+        AzionAPI(url_api=self.url, token='b').get(CDNS)
+        self.assertEqual(self._upstream_gets(CDNS), 2)
+
+    def test_write_invalidates(self):
+        api = AzionAPI(url_api=self.url, token='t')
+        for path in (CDNS, CDNS + '/1', CDNS + '/12'):
+            api.get(path)
+
+        self.assertEqual(api.update(CDNS + '/1', {'name': 'new'})['name'],
+                         'new')
+        for path in (CDNS, CDNS + '/1', CDNS + '/12'):
+            api.get(path)
+
+        self.assertEqual(self._upstream_gets(CDNS), 2)
+        self.assertEqual(self._upstream_gets(CDNS + '/1'), 2)
+        self.assertEqual(self._upstream_gets(CDNS + '/12'), 1)
+
+    def test_default_limiter_dropped_behind_proxy(self):
+        api = AzionAPI(url_api=self.url, token='t')
+        self.assertIsNotNone(api.rate_limiter)
+
+        api.get(CDNS)
+        self.assertIsNone(api.rate_limiter)
+        self.assertIsNone(api.scheduler)
+
+        # more requests than the default 20 per minute, without waiting
+        for _ in range(30):
+            api.get(CDNS)
+        self.assertEqual(api.stats.summary()['requests'], 31)
+
+    def test_shared_limiter_kept_behind_proxy(self):
+        limiter = RateLimiter(100, 60)
+        api = AzionAPI(url_api=self.url, token='t', rate_limiter=limiter)
+
+        api.get(CDNS)
+        self.assertIs(api.rate_limiter, limiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
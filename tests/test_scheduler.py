@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from azion.scheduler import RequestScheduler
+from azion.service_api import APIService
+from azion.transport import MemoryTransport
+
+
+class GateLimiter(object):
+    """ Rate limiter granting only the permits released by the test. """
+
+    def __init__(self):
+        self.permits = 0
+        self.lock = threading.Lock()
+
+    def release(self, n=1):
+        with self.lock:
+            self.permits += n
+
+    def wait_time(self):
+        return 0 if self.permits > 0 else 0.01
+
+    def try_acquire(self):
+        with self.lock:
+            if self.permits > 0:
+                self.permits -= 1
+                return True
+            return False
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.005)
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = GateLimiter()
+        self.scheduler = RequestScheduler(self.limiter)
+        self.served = []
+        self.threads = []
+
+    def tearDown(self):
+        self.limiter.release(len(self.threads))
+        for t in self.threads:
+            t.join(5)
+
+    def _queue(self, name, priority, flow):
+        """ Queue one request and wait for it to be in the scheduler. """
+        queued = sum(self.scheduler.depth().values())
+
+        def run():
+            self.scheduler.acquire(priority, flow=flow)
+            self.served.append(name)
+
+        t = threading.Thread(target=run)
+        t.daemon = True
+        t.start()
+        self.threads.append(t)
+        _wait_for(lambda: sum(self.scheduler.depth().values()) > queued)
+
+    def _serve(self, n):
+        """ Grant n permits one at a time and return the served order. """
+        for i in range(n):
+            self.limiter.release()
+            _wait_for(lambda: len(self.served) > i)
+        return list(self.served)
+
+    def test_priority_order(self):
+        self._queue('bulk', 'bulk', 'a')
+        self._queue('normal', 'normal', 'b')
+        self._queue('interactive', 'interactive', 'c')
+
+        self.assertEqual(self._serve(3), ['interactive', 'normal', 'bulk'])
+
+    def test_flows_are_served_in_turns(self):
+        for i in range(3):
+            self._queue('long-%d' % i, 'bulk', 'long')
+        self._queue('short', 'bulk', 'short')
+
+        self.assertEqual(self._serve(4),
+                         ['long-0', 'short', 'long-1', 'long-2'])
+
+    def test_unknown_priority(self):
+        self.assertRaises(ValueError, self.scheduler.acquire, 'urgent')
+
+    def test_summary_counts_served(self):
+        self._queue('x', 'interactive', 'a')
+        self._serve(1)
+
+        summary = self.scheduler.summary()
+        self.assertEqual(summary['interactive']['served'], 1)
+        self.assertEqual(summary['bulk']['depth'], 0)
+
+
+class PriorityContextTest(unittest.TestCase):
+
+    def test_priority_context(self):
+        transport = MemoryTransport()
+        scheduler = RequestScheduler(GateLimiter())
+        scheduler.rate_limiter.release(3)
+        api = APIService('http://api', transport=transport,
+                         scheduler=scheduler)
+
+        with api.priority('bulk'):
+            api.get('/x')
+            with api.priority('interactive', override=False):
+                self.assertEqual(api.get_priority(), 'bulk')
+                api.get('/x')
+        api.request('GET', '/x', priority='interactive')
+
+        self.assertEqual(scheduler.served['bulk'], 2)
+        self.assertEqual(scheduler.served['interactive'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
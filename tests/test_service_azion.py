@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from azion.service_azion import AzionAPI
+from azion.throttle import RateLimiter
+from azion.transport import MemoryTransport
+
+from .fake import FakeAzion, CDNS
+
+
+class RateLimitTest(unittest.TestCase):
+
+    def test_default_limit(self):
+        api = AzionAPI(token='t', transport=MemoryTransport())
+        self.assertEqual(api.rate_limiter.limit, 20)
+        self.assertEqual(api.throtle_limit_min, 20)
+
+    def test_limit_disabled(self):
+        transport = MemoryTransport()
+        api = AzionAPI(token='t', transport=transport, rate_limit=None)
+        self.assertIsNone(api.rate_limiter)
+        self.assertIsNone(api.scheduler)
+
+        for _ in range(30):
+            api.get(CDNS)
+        self.assertEqual(len(transport.calls), 30)
+        self.assertGreater(api.plan_get_cdn_config(cdn_count=30).estimate(),
+                           0)
+
+    def test_shared_limiter(self):
+        limiter = RateLimiter(2, 60)
+        a = AzionAPI(token='a', transport=MemoryTransport(),
+                     rate_limiter=limiter)
+        b = AzionAPI(token='b', transport=MemoryTransport(),
+                     rate_limiter=limiter)
+
+        a.get(CDNS)
+        b.get(CDNS)
+        self.assertIs(a.rate_limiter, b.rate_limiter)
+        self.assertEqual(a.throtle_limit_min, 2)
+        self.assertFalse(limiter.try_acquire())
+
+
+class CloneCdnTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        self.api = AzionAPI(token='t', transport=self.transport)
+
+    def _gets(self, path):
+        return len([c for c in self.transport.calls
+                    if c[0] == 'GET' and c[1] == path])
+
+    def test_clone_by_name(self):
+        origins = [{'origin_id': 1, 'name': 'o1'},
+                   {'origin_id': 2, 'name': 'o2'}]
+        self.transport.add_cdn('www', origins=origins,
+                               rules_engine=[{'path': '/',
+                                              'path_origin_id': 2}])
+
+        cdn, status = self.api.clone_cdn('www', 'copy')
+
+        self.assertEqual(status, self.api.status['ok'])
+        self.assertEqual([o['name'] for o in cdn['origins']], ['o1', 'o2'])
+        rule = cdn['rules_engine'][0]
+        self.assertEqual(rule['path_origin_id'], cdn['origins'][1]['origin_id'])
+
+    def test_clone_expands_first_match_only(self):
+        first = self.transport.add_cdn('www')
+        second = self.transport.add_cdn('www')
+
+        self.api.clone_cdn('www', 'copy', concurrency=1)
+
+        self.assertEqual(self._gets('%s/%d/origins' % (CDNS, first)), 1)
+        self.assertEqual(self._gets('%s/%d/origins' % (CDNS, second)), 0)
+
+    def test_workers_inherit_priority(self):
+        self.transport.add_cdn('www', origins=[
+            {'origin_id': i, 'name': 'o%d' % i} for i in range(4)])
+        self.api.rate_limiter.limit = 100
+
+        with self.api.priority('bulk'):
+            self.api.clone_cdn('www', 'copy', concurrency=4)
+
+        served = self.api.scheduler.served
+        self.assertEqual(served['normal'], 0)
+        self.assertEqual(served['bulk'], len(self.transport.calls))
+
+
+class IterCdnConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        for i in range(20):
+            self.transport.add_cdn('cdn-%d' % i)
+        self.api = AzionAPI(token='t', transport=self.transport,
+                            rate_limit=None)
+
+    def test_iter_cdn_config(self):
+        names = [c['name'] for c in self.api.iter_cdn_config(concurrency=4)]
+        self.assertEqual(sorted(names), sorted('cdn-%d' % i
+                                               for i in range(20)))
+
+    def test_close_stops_expanding(self):
+        self.transport.latency = 0.01
+        configs = self.api.iter_cdn_config(concurrency=2)
+        next(configs)
+        self.assertEqual(self.api.get_priority(), 'normal')
+        configs.close()
+        time.sleep(0.1)
+
+        # list + 3 sub-resources of at most the 2 * concurrency CDNs queued
+        self.assertLessEqual(len(self.transport.calls), 1 + 3 * 5)
+
+
+class FetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        for i in range(10):
+            self.transport.add_cdn('cdn-%d' % i, rules_engine=[
+                {'id': i, 'path': '/', 'behavior': 'deliver'}])
+        self.api = AzionAPI(token='t', transport=self.transport,
+                            rate_limit=None)
+
+    def _paths(self):
+        return set(c[1].rsplit('/', 1)[-1] for c in self.transport.calls)
+
+    def test_sparse_fetch(self):
+        cdns = list(self.api.fetch(['cname', 'rules_engine.path'],
+                                   concurrency=3))
+
+        self.assertEqual(len(cdns), 10)
+        self.assertEqual(cdns[0]['rules_engine'], [{'path': '/'}])
+        self.assertEqual(self._paths(), set(['configurations',
+                                             'rules_engine']))
+
+    def test_fetch_by_name(self):
+        cdns = list(self.api.fetch(['rules_engine'], cdn_name='cdn-4'))
+        self.assertEqual([c['name'] for c in cdns], ['cdn-4'])
+
+    def test_close_stops_fetching(self):
+        self.transport.latency = 0.01
+        cdns = self.api.fetch(['origins'], concurrency=2)
+        next(cdns)
+        self.assertEqual(self.api.get_priority(), 'normal')
+        cdns.close()
+        time.sleep(0.1)
+
+        self.assertLessEqual(len(self.transport.calls), 1 + 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
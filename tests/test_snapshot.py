@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from azion.service_azion import AzionAPI
+from azion.snapshot import SnapshotWriter, SnapshotReader, SnapshotError
+
+from .fake import FakeAzion
+
+
+def _cdn(i):
+    return {
+        'id': i,
+        'name': 'cdn-%d' % i,
+        'cname': ['www%d.example.com' % i],
+        'origins': [{'origin_id': 100 + i, 'name': 'origin',
+                     'addresses': [{'address': 'backend.example.com'}]}],
+        'cache_settings': [{'id': 200 + i, 'name': 'default',
+                            'browser_cache_settings': 'honor'}],
+        'rules_engine': [{'id': 300 + i, 'path': '/%d' % i,
+                          'path_origin_id': 100 + i}],
+    }
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'cdns.snap')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, cdns):
+        with SnapshotWriter(self.path) as snap:
+            for c in cdns:
+                snap.write(c)
+
+    def test_round_trip(self):
+        cdns = [_cdn(i) for i in range(10)]
+        self._write(cdns)
+
+        with SnapshotReader(self.path) as snap:
+            self.assertEqual(len(snap), 10)
+            self.assertEqual(list(snap), cdns)
+
+    def test_random_access(self):
+        self._write([_cdn(i) for i in range(10)])
+
+        with SnapshotReader(self.path) as snap:
+            self.assertEqual(snap.get(cdn_id=7), _cdn(7))
+            self.assertEqual(snap.get(cdn_name='cdn-3'), _cdn(3))
+            self.assertEqual(snap.get(cdn_id=0), _cdn(0))
+            self.assertIsNone(snap.get(cdn_id=42))
+            self.assertEqual(snap.names()[:2], ['cdn-0', 'cdn-1'])
+
+    def test_equal_sub_resources_are_stored_once(self):
+        self._write([_cdn(i) for i in range(10)])
+
+        with SnapshotReader(self.path) as snap:
+            # one origin and one cache settings blob, a rule per CDN
+            self.assertEqual(len(snap._blobs), 2 + 10)
+
+    def test_loaded_configs_are_independent(self):
+        self._write([_cdn(1), _cdn(2)])
+
+        with SnapshotReader(self.path) as snap:
+            first = snap.get(cdn_id=1)
+            first['origins'][0]['addresses'][0]['address'] = 'evil'
+            first['cache_settings'][0]['name'] = 'changed'
+
+            self.assertEqual(snap.get(cdn_id=2), _cdn(2))
+            self.assertEqual(snap.get(cdn_id=1), _cdn(1))
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{}')
+        self.assertRaises(SnapshotError, SnapshotReader, self.path)
+
+    def test_api_snapshot(self):
+        transport = FakeAzion()
+        for i in range(5):
+            transport.add_cdn('cdn-%d' % i,
+                              origins=[{'origin_id': i, 'name': 'o'}])
+        api = AzionAPI(token='t', transport=transport, rate_limit=None)
+
+        self.assertEqual(api.snapshot(self.path, concurrency=2), 5)
+        with SnapshotReader(self.path) as snap:
+            cdn = snap.get(cdn_name='cdn-4')
+            self.assertEqual(cdn['origins'], [{'origin_id': 4, 'name': 'o'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
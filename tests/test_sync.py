@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.service_azion import AzionAPI
+from azion.sync import SyncState
+from azion.transport import MemoryTransport
+
+CDNS = '/content_delivery/configurations'
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.transport.add('GET', CDNS, [{'id': 1, 'name': 'www'}])
+        self.origins = [{'origin_id': 10, 'name': 'origin'}]
+        self.transport.add('GET', CDNS + '/1/origins',
+                           lambda *args: (200, self.origins))
+        self.transport.add('GET', CDNS + '/1/cache_settings', [])
+        self.transport.add('GET', CDNS + '/1/rules_engine', [])
+        self.api = AzionAPI(token='t', transport=self.transport)
+        self.state = SyncState()
+
+    def _events(self):
+        return [(e.action, e.kind, e.resource_id)
+                for e in self.api.sync(self.state)]
+
+    def test_sync_changes(self):
+        self.assertEqual(self._events(), [('added', 'cdn', 1),
+                                          ('added', 'origins', 10)])
+        self.assertEqual(self._events(), [])
+
+        self.transport.add('GET', CDNS, [])
+        self.assertEqual(self._events(), [('removed', 'origins', 10),
+                                          ('removed', 'cdn', 1)])
+
+    def test_failed_sub_resource_is_fetched_again(self):
+        self.transport.add('GET', CDNS + '/1/origins', {'detail': 'x'}, 500)
+        self.assertEqual(self._events(), [('added', 'cdn', 1)])
+        self.assertFalse(self.state.cdns[1]['complete'])
+
+        # unchanged CDN, expanded again because it was incomplete
+        self.transport.add('GET', CDNS + '/1/origins', self.origins)
+        self.assertEqual(self._events(), [('added', 'origins', 10)])
+        self.assertTrue(self.state.cdns[1]['complete'])
+        self.assertEqual(self._events(), [])
+
+    def test_failure_keeps_previous_hashes(self):
+        self._events()
+        hashes = dict(self.state.cdns[1]['resources']['origins'])
+        self.transport.add('GET', CDNS + '/1/origins', {'detail': 'x'}, 500)
+        del self.transport.calls[:]
+
+        events = [(e.action, e.kind) for e in
+                  self.api.sync(self.state, max_age=0)]
+
+        # the failing sub-resource was requested, no removal is reported
+        self.assertIn(CDNS + '/1/origins',
+                      [c[1] for c in self.transport.calls])
+        self.assertEqual(events, [])
+        self.assertEqual(self.state.cdns[1]['resources']['origins'], hashes)
+        self.assertFalse(self.state.cdns[1]['complete'])
+
+    def test_state_round_trip(self):
+        self.transport.add('GET', CDNS + '/1/origins', {'detail': 'x'}, 500)
+        self._events()
+
+        state = SyncState.from_dict(self.state.to_dict())
+        self.assertEqual(state.cdns, self.state.cdns)
+        self.assertFalse(state.cdns[1]['complete'])
+
+    def test_priority_not_held_across_yield(self):
+        events = self.api.sync(self.state)
+        next(events)
+        self.assertEqual(self.api.get_priority(), 'normal')
+        list(events)
+
+
+if __name__ == '__main__':
+    unittest.main()
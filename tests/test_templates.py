@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion import sample
+from azion.service_azion import AzionAPI
+from azion.templates import PayloadTemplate, Param, generate_payloads
+
+from .fake import FakeAzion
+
+
+class PayloadTemplateTest(unittest.TestCase):
+
+    def test_render(self):
+        template = PayloadTemplate({'name': '{cdn_name}',
+                                    'ttl': Param('ttl', int),
+                                    'origin': {'host': 'origin.{cdn_name}'},
+                                    'cname': ['static']},
+                                   defaults={'ttl': '60'})
+
+        self.assertEqual(template.render(cdn_name='a'), {
+            'name': 'a', 'ttl': 60, 'origin': {'host': 'origin.a'},
+            'cname': ['static']})
+
+    def test_template_is_copied_at_compile(self):
+        source = {'name': 'x', 'rules': [{'path': '/'}]}
+        template = PayloadTemplate(source)
+
+        self.assertIsNot(template.render()['rules'], source['rules'])
+
+        payload = template.render(share=False)
+        payload['rules'][0]['path'] = '/hacked/'
+        self.assertEqual(source['rules'][0]['path'], '/')
+
+        source['rules'][0]['path'] = '/changed/'
+        self.assertEqual(template.render()['rules'][0]['path'], '/')
+
+    def test_generated_payloads_are_independent(self):
+        rules = [dict(r) for r in sample.AZION_CDN_RULES]
+        payloads = list(generate_payloads([{'cdn_name': 'a'},
+                                           {'cdn_name': 'b'}]))
+
+        payloads[0]['rules_engine'][0]['path'] = '/hacked/'
+        payloads[0]['cache_settings'].append({'name': 'extra'})
+
+        self.assertNotEqual(payloads[1]['rules_engine'][0]['path'],
+                            '/hacked/')
+        self.assertEqual(sample.AZION_CDN_RULES, rules)
+        self.assertEqual(sample.azion_cdn_rules(), rules)
+        self.assertEqual(len(payloads[1]['cache_settings']),
+                         len(sample.AZION_CDN_CACHE))
+
+    def test_shared_payloads_opt_in(self):
+        payloads = list(generate_payloads([{'cdn_name': 'a'},
+                                           {'cdn_name': 'b'}], share=True))
+        self.assertIs(payloads[0]['rules_engine'],
+                      payloads[1]['rules_engine'])
+        self.assertIsNot(payloads[0]['rules_engine'],
+                         sample.AZION_CDN_RULES)
+
+
+class CreateCdnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = FakeAzion()
+        self.transport.add_cdn('existing')
+        self.api = AzionAPI(token='t', transport=self.transport,
+                            rate_limit=None)
+
+    def _rows(self, n, consumed):
+        for i in range(n):
+            consumed.append(i)
+            yield {'cdn_name': 'tenant-%d' % i}
+
+    def test_create_cdns(self):
+        consumed = []
+        rows = list(self._rows(3, consumed)) + [{'cdn_name': 'existing'}]
+        results = list(self.api.create_cdns(generate_payloads(rows),
+                                            concurrency=2))
+
+        self.assertEqual([name for name, _ in results],
+                         ['tenant-0', 'tenant-1', 'tenant-2', 'existing'])
+        self.assertEqual([status for _, (_, status) in results],
+                         [200, 200, 200, self.api.status['exists']])
+
+    def test_close_stops_creating(self):
+        consumed = []
+        self.transport.latency = 0.01
+        results = self.api.create_cdns(
+            generate_payloads(self._rows(50, consumed)), concurrency=2)
+
+        next(results)
+        self.assertEqual(self.api.get_priority(), 'normal')
+        results.close()
+
+        self.assertLessEqual(len(consumed), 5)
+        self.assertLess(len(self.transport.cdns), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
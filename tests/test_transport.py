@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from azion.service_api import APIService
+from azion.transport import (Transport, MemoryTransport, RequestsTransport,
+                             HTTP2Transport)
+
+
+class Session(object):
+    """ Stand-in for requests.Session / httpx.Client recording calls. """
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, *args, **kwargs):
+        self.calls.append(kwargs)
+        return None
+
+
+class TransportTest(unittest.TestCase):
+
+    def test_transport_is_abstract(self):
+        self.assertRaises(TypeError, Transport)
+
+        class Incomplete(Transport):
+            pass
+
+        self.assertRaises(TypeError, Incomplete)
+
+    def test_extra_kwargs_reach_the_session(self):
+        session = Session()
+        api = APIService('http://api',
+                         transport=RequestsTransport(session=session))
+        api.request('GET', '/x', verify=False, allow_redirects=False)
+
+        self.assertFalse(session.calls[0]['verify'])
+        self.assertFalse(session.calls[0]['allow_redirects'])
+
+    def test_http2_maps_allow_redirects(self):
+        client = Session()
+        transport = HTTP2Transport(client=client)
+        transport.request('GET', 'http://api/x', allow_redirects=False)
+
+        self.assertFalse(client.calls[0]['follow_redirects'])
+        self.assertNotIn('allow_redirects', client.calls[0])
+
+    def test_http2_rejects_requests_only_options(self):
+        client = Session()
+        api = APIService('http://api',
+                         transport=HTTP2Transport(client=client))
+
+        for option in ('verify', 'cert', 'proxies', 'stream'):
+            with self.assertRaises(ValueError) as ctx:
+                api.request('GET', '/x', **{option: False})
+            self.assertIn(option, str(ctx.exception))
+        self.assertEqual(client.calls, [])
+
+    def test_http2_client_options(self):
+        transport = HTTP2Transport(verify=False, follow_redirects=True)
+        self.assertTrue(transport.client.follow_redirects)
+        transport.close()
+
+    def test_memory_transport_accepts_kwargs(self):
+        transport = MemoryTransport()
+        transport.add('GET', '/x', {'ok': True})
+        api = APIService('http://api', transport=transport)
+
+        response = api.request('GET', '/x', verify=False)
+        self.assertEqual(response.json(), {'ok': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
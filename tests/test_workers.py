@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+from azion.workers import run_bounded
+
+
+class RunBoundedTest(unittest.TestCase):
+
+    def test_inline(self):
+        threads = set()
+
+        def fn(i):
+            threads.add(threading.current_thread())
+            return i * 2
+
+        self.assertEqual(list(run_bounded(fn, range(3))), [0, 2, 4])
+        self.assertEqual(threads, set([threading.current_thread()]))
+
+    def test_ordered(self):
+        def fn(i):
+            time.sleep(0.01 * (5 - i))
+            return i
+
+        self.assertEqual(list(run_bounded(fn, range(5), 3, ordered=True)),
+                         list(range(5)))
+
+    def test_completion_order(self):
+        def fn(i):
+            time.sleep(0.2 if i == 0 else 0)
+            return i
+
+        results = list(run_bounded(fn, range(4), 4))
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertEqual(results[-1], 0)
+
+    def test_items_consumed_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        results = run_bounded(lambda i: i, items(), 2)
+        next(results)
+        self.assertLessEqual(len(consumed), 4)
+        results.close()
+
+    def test_close_cancels_pending(self):
+        started = []
+        release = threading.Event()
+
+        def fn(i):
+            started.append(i)
+            if i:
+                release.wait(5)
+            return i
+
+        results = run_bounded(fn, range(10), 2, ordered=True)
+        self.assertEqual(next(results), 0)
+        results.close()
+        release.set()
+        time.sleep(0.1)
+
+        self.assertLess(len(started), 4)
+
+    def test_errors_are_raised(self):
+        def fn(i):
+            raise ValueError(i)
+
+        self.assertRaises(ValueError, list, run_bounded(fn, range(3), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()